@@ -1,73 +1,94 @@
-import os, logging
-from flask import Flask, jsonify, request, session
+import os, logging, time
+import click
+from flask import Blueprint, Flask, abort, current_app, Response, jsonify, request, session, stream_with_context
 from flask_cors import CORS
+from flask_migrate import Migrate
+from sqlalchemy import select
 from models import db, User, Vet, Pet, Medication, Billing, Appointment, Record # Import the db and models
-from dotenv import load_dotenv
-from datetime import datetime, timedelta
-from flask_jwt_extended import jwt_required, get_jwt_identity, create_access_token, JWTManager
-
-
-load_dotenv()
-
-# Initialize Flask app
-app = Flask(__name__)
-
-# Configuration
-app.config['JWT_SECRET_KEY'] = os.getenv('SECRET_KEY', 'supersecretkey')  
-app.config['JWT_TOKEN_LOCATION'] = ['headers']
-
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SESSION_COOKIE_SAMESITE'] = 'None'  # For cross-origin session cookies
-app.config['SESSION_COOKIE_SECURE'] = False  # Set to True if using HTTPS, False otherwise (especially on localhost)
-app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=2)
-
-jwt = JWTManager(app)
-
-db.init_app(app)
-
-CORS(app, resources={r"/*": {"origins": "http://localhost:3000"}}, supports_credentials=True)
+import queries, bulk, export, cache, schemas, identity, availability, search, reports, reminders, replicas, updates, instrumentation, passwords
+from config import CONFIGS
+from passwords import HashPoolBusy
+from validation import END_DATE_REQUIRED, ValidationError, parse_bool, parse_date, parse_int, parse_price, validate_medication, validate_billing, validate_record
+from datetime import datetime
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity, create_access_token, JWTManager
+
+
+jwt = JWTManager()
+migrate = Migrate()
+
+# All routes live on this blueprint; create_app() builds and configures the app.
+api = Blueprint('api', __name__, cli_group=None)
+
+# List endpoints keep returning a plain JSON array; when a `limit` is given and
+# more rows remain, the cursor for the next page travels in X-Next-Cursor.
+def list_response(results, page, status=200):
+    response = schemas.json_response(results, status)
+    if page.next_cursor:
+        response.headers['X-Next-Cursor'] = page.next_cursor
+    return response
+
+# Bulk variants of the POST routes: accept a JSON array, NDJSON or CSV body and
+# report which rows were rejected instead of failing the whole upload.
+def bulk_import(model, validate, defaults=None, after_insert=None):
+    try:
+        rows = bulk.read_rows(request)
+    except ValidationError as e:
+        return jsonify({'error': e.message}), e.status
 
-def get_medications_by_user_id(user_id, db):
-    return (
-        db.session.query(Medication, Pet.name.label("pet_name"))  
-        .join(Pet, Medication.pet_id == Pet.id)  
-        .filter(Medication.user_id == user_id)
-        .all()
-    )
+    inserted, errors, user_ids = bulk.import_rows(model, rows, validate, defaults, after_insert)
+    for user_id in user_ids:
+        cache.invalidate_user(user_id)
+    status = 201 if inserted and not errors else 207 if inserted else 400
+    return jsonify({'inserted': inserted, 'failed': len(errors), 'errors': errors}), status
 
 # Define routes
-@app.route('/')
+@api.route('/')
 def home():
     return "Welcome to NinerPets!"
 
 from flask_jwt_extended import create_access_token
 
-@app.route('/login', methods=['POST'])
+@api.route('/login', methods=['POST'])
 def login():
     data = request.json
     email_or_username = data.get('email_or_username')
     password = data.get('password')
 
-    user = User.query.filter(
-        (User.email == email_or_username) | (User.username == email_or_username)
-    ).first()
+    # Two equality probes, each served by its own unique index, instead of an
+    # OR across both columns. Try the likelier column first.
+    if email_or_username and '@' in email_or_username:
+        probes = (User.email, User.username)
+    else:
+        probes = (User.username, User.email)
+    user = None
+    for column in probes:
+        user = User.query.filter(column == email_or_username).first()
+        if user:
+            break
 
-    if user and user.check_password(password):
-        token = create_access_token(identity=user.id)
+    try:
+        valid = bool(user and password) and user.check_password(password)
+    except HashPoolBusy:
+        return jsonify({'error': 'Too many login attempts in progress, please retry.'}), 503, {'Retry-After': '1'}
+
+    if valid:
+        if user.password_needs_rehash():
+            user.set_password(password)
+            db.session.commit()
+        token = create_access_token(identity=user.id, additional_claims=identity.identity_claims(user))
         return jsonify({'message': 'Login successful', 'token': token}), 200
     else:
         return jsonify({'error': 'Invalid credentials'}), 401
     
     
-@app.route('/current_user', methods=['GET'])
+@api.route('/current_user', methods=['GET'])
 def current_user():
     if 'user_id' in session:
-        user = User.query.get(session['user_id'])  
-        return jsonify({'user_id': user.id, 'username': user.username}), 200
+        user = identity.lookup_user(session['user_id'])
+        return jsonify({'user_id': user['id'], 'username': user['username']}), 200
     return jsonify({'error': 'Not logged in'}), 401
 
-@app.route('/register', methods=['OPTIONS', 'POST'])
+@api.route('/register', methods=['OPTIONS', 'POST'])
 def register():
     if request.method == 'OPTIONS':
         return '', 200
@@ -94,16 +115,49 @@ def register():
 
     return jsonify({'message': 'User registered successfully'}), 201
 
-@app.route('/vets', methods=['GET'])
+@api.route('/vets', methods=['GET'])
+@replicas.read_only(scope='vets')
+@cache.conditional_response('vets', scope='vets')
+@cache.cached_response('vets', scope='vets', ttl=cache.VETS_TTL)
 def get_vets():
-    vets = Vet.query.all()  
-    return jsonify([vet.to_dict() for vet in vets]) 
+    try:
+        list_args = queries.parse_list_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    page = queries.get_vets(list_args)
+    return list_response(schemas.vets_out(page.items), page)
+
+MAX_AVAILABILITY_DAYS = 31
+MAX_AVAILABILITY_VETS = 20
+
+# Open slots per vet and working day: ?vet_id=1,2&start=YYYY-MM-DD&end=YYYY-MM-DD
+@api.route('/vets/availability', methods=['GET'])
+@replicas.read_only(scope=availability.vet_scopes)
+def get_vet_availability():
+    try:
+        vet_ids = sorted({parse_int(vet_id, 'vet_id')
+                          for vet_id in request.args.get('vet_id', '').split(',') if vet_id})
+        start = parse_date(request.args.get('start'))
+        end = parse_date(request.args.get('end'))
+    except ValidationError as e:
+        return jsonify({'error': e.message}), e.status
+    if not vet_ids:
+        return jsonify({'error': 'vet_id is required'}), 400
+    if len(vet_ids) > MAX_AVAILABILITY_VETS:
+        return jsonify({'error': f'At most {MAX_AVAILABILITY_VETS} vets per request.'}), 400
+    if not 0 <= (end - start).days < MAX_AVAILABILITY_DAYS:
+        return jsonify({'error': f'end must be on or after start and at most {MAX_AVAILABILITY_DAYS} days later.'}), 400
+
+    slots = availability.free_slots(vet_ids, start, end)
+    return schemas.json_response(schemas.vet_slots_out(slots))
 
 from flask import jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
-@app.route('/user', methods=['GET'])
+@api.route('/user', methods=['GET'])
+@replicas.read_only()
 @jwt_required()  
 def get_user():
     try:
@@ -111,29 +165,75 @@ def get_user():
         if not current_user_id:
             return jsonify({"msg": "Missing claim: sub"}), 422
 
-        user = User.query.get(current_user_id)
+        user = identity.current_identity(current_user_id, get_jwt())
         if user:
-            return jsonify({
-                'id': user.id,
-                'username': user.username,
-                'email': user.email,
-            }), 200
+            return jsonify(user), 200
         else:
             return jsonify({"msg": "User not found"}), 404
 
     except Exception as e:
         return jsonify({"msg": f"Error: {str(e)}"}), 500
 
-@app.route('/get_username', methods=['GET'])
+DASHBOARD_SECTIONS = ('user', 'pets', 'appointments', 'medications', 'reminders', 'billing', 'vets')
+DASHBOARD_RECENT_BILLING = 10
+
+# Everything a page needs on load in one request: one JWT decode and one
+# connection checkout instead of a request per section. `include=` picks the
+# sections (all by default).
+#
+# The sections still run one after another, one indexed query each, so the
+# statement count is fixed by the sections asked for and never by the rows
+# (tests/test_query_counts.py holds it there). They are not folded into one
+# UNION ALL: the sections have different columns, so that would mean JSON
+# aggregation in SQL, written twice (json_agg on Postgres, json_group_array
+# on SQLite), in place of the typed rows the list routes already serialize.
+@api.route('/dashboard', methods=['GET'])
+@replicas.read_only()
+@jwt_required()
+def get_dashboard():
+    user_id = get_jwt_identity()
+    include = request.args.get('include')
+    sections = include.split(',') if include else DASHBOARD_SECTIONS
+    unknown = [section for section in sections if section not in DASHBOARD_SECTIONS]
+    if unknown:
+        return jsonify({'error': f"Unknown sections: {', '.join(unknown)}"}), 400
+
+    today = datetime.utcnow().date()
+    dashboard = {}
+    if 'user' in sections:
+        dashboard['user'] = identity.current_identity(user_id, get_jwt())
+    if 'pets' in sections:
+        dashboard['pets'] = schemas.pets_out(queries.get_pets_by_user_id(user_id).items)
+    if 'appointments' in sections:
+        upcoming = queries.NO_LIST_ARGS._replace(start=today)
+        dashboard['appointments'] = schemas.appointments_out(
+            queries.get_appointments_by_user_id(user_id, upcoming).items
+        )
+    if 'medications' in sections:
+        dashboard['medications'] = schemas.medications_out(
+            queries.get_active_medications_by_user_id(user_id, today)
+        )
+    if 'reminders' in sections:
+        dashboard['reminders'] = schemas.reminders_out(queries.get_upcoming_reminders_by_user_id(user_id, today))
+    if 'billing' in sections:
+        dashboard['billing'] = schemas.billing_out(
+            queries.get_recent_billing_by_user_id(user_id, DASHBOARD_RECENT_BILLING)
+        )
+    if 'vets' in sections:
+        dashboard['vets'] = schemas.vets_out(queries.get_vets().items)
+
+    return schemas.json_response(dashboard)
+
+@api.route('/get_username', methods=['GET'])
 def get_username():
     if 'user_id' in session:
         user_id = session['user_id']
-        user = User.query.get(user_id)
+        user = identity.lookup_user(user_id)
         if user:
-            return jsonify({'username': user.username})
+            return jsonify({'username': user['username']})
     return jsonify({'username': None}), 401
 
-@app.route('/add_vet', methods=['POST'])
+@api.route('/add_vet', methods=['POST'])
 def add_vet():
     data = request.json
     name = data.get('name')
@@ -143,10 +243,14 @@ def add_vet():
     new_vet = Vet(name=name, specialty=specialty, information=information)
     db.session.add(new_vet)
     db.session.commit()
+    cache.invalidate_vets()
 
     return jsonify({'message': 'Vet added successfully'}), 201
 
-@app.route('/pets', methods=['GET'])
+@api.route('/pets', methods=['GET'])
+@replicas.read_only()
+@cache.conditional_response('pets')
+@cache.cached_response('pets')
 def get_pets():
     user_id = request.args.get('user_id')
     if user_id and user_id.lower() == 'null':
@@ -157,14 +261,19 @@ def get_pets():
     except ValueError:
         return jsonify({'error': 'User ID must be a valid integer'}), 400
 
-    pets = Pet.query.filter_by(user_id=user_id).all()
+    try:
+        list_args = queries.parse_list_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-    if not pets:
+    page = queries.get_pets_by_user_id(user_id, list_args)
+
+    if not page.items:
         return jsonify({'message': 'No pets found for this user'}), 404
 
-    return jsonify([pet.to_dict() for pet in pets])
+    return list_response(schemas.pets_out(page.items), page)
 
-@app.route('/pets', methods=['POST'])
+@api.route('/pets', methods=['POST'])
 def add_pet():
     data = request.json
     user_id = data.get('user_id')
@@ -176,207 +285,184 @@ def add_pet():
 
     if not all([name, species, breed, dob, weight, user_id]):
         return jsonify({'error': 'All fields are required.'}), 400
+    try:
+        dob = parse_date(dob)
+    except ValidationError as e:
+        return jsonify({'error': e.message}), e.status
 
     new_pet = Pet(user_id=user_id, name=name, species=species, breed=breed, dob=dob, weight=weight)
     db.session.add(new_pet)
     db.session.commit()
+    cache.invalidate_user(user_id)
 
     return jsonify({'message': 'Pet added successfully'}), 201
 
-@app.route('/pets/<int:pet_id>', methods=['PUT'])
+@api.route('/pets/<int:pet_id>', methods=['PUT'])
 def update_pet(pet_id):
     data = request.json
-    pet = Pet.query.get_or_404(pet_id)
-
-    pet.name = data.get('name', pet.name)
-    pet.species = data.get('species', pet.species)
-    pet.breed = data.get('breed', pet.breed)
-    pet.dob = data.get('dob', pet.dob)
-    pet.weight = data.get('weight', pet.weight)
+    values = {field: data[field] for field in ('name', 'species', 'breed', 'weight') if field in data}
+    try:
+        if 'dob' in data:
+            values['dob'] = parse_date(data['dob'])
+        pet = updates.update_returning(Pet, pet_id, values, (Pet.user_id, Pet.version))
+        if pet is None:
+            updates.explain_no_match(Pet, pet_id)
+    except ValidationError as e:
+        return jsonify({'error': e.message}), e.status
 
     db.session.commit()
-    return jsonify({'message': 'Pet updated successfully'}), 200
+    cache.invalidate_user(pet.user_id)
+    return updates.with_version(jsonify({'message': 'Pet updated successfully'}), pet.version)
 
-@app.route('/pets/<int:pet_id>', methods=['DELETE'])
+@api.route('/pets/<int:pet_id>', methods=['DELETE'])
 def delete_pet(pet_id):
-    pet = Pet.query.get(pet_id)
-    if not pet:
+    user_id = db.session.query(Pet.user_id).filter_by(id=pet_id).scalar()
+    if user_id is None:
         return jsonify({'message': 'Pet not found'}), 404
 
-    medications = Medication.query.filter_by(pet_id=pet_id).all()
-    for med in medications:
-        db.session.delete(med)
-
-    billing_entries = Billing.query.filter_by(pet_id=pet_id).all()
-    for billing in billing_entries:
-        db.session.delete(billing)
+    vet_ids = queries.get_pet_vet_ids(pet_id)
 
-    appointments = Appointment.query.filter_by(pet_id=pet_id).all()
-    for appointment in appointments:
-        db.session.delete(appointment)
+    # Remove the pet's history with one set-based DELETE per table instead of
+    # loading and deleting each row through the session.
+    deleted = {}
+    reminders.forget_pet(pet_id)
+    for model in (Medication, Billing, Appointment, Record):
+        deleted[model.__tablename__] = (
+            model.query.filter_by(pet_id=pet_id).delete(synchronize_session=False)
+        )
 
-    records = Record.query.filter_by(pet_id=pet_id).all()
-    for record in records:
-        db.session.delete(record)
+    deleted['pets'] = Pet.query.filter_by(id=pet_id).delete(synchronize_session=False)
+    reports.forget_pet(pet_id)
 
-    db.session.delete(pet)
     db.session.commit()
-    return jsonify({'message': 'Pet and associated medications deleted successfully'}), 200
+    cache.invalidate_user(user_id)
+    availability.invalidate(*vet_ids)
+    return jsonify({'message': 'Pet and associated medications deleted successfully', 'deleted': deleted}), 200
 
-@app.route('/medications', methods=['POST'])
+@api.route('/medications', methods=['POST'])
 def add_medication():
-    data = request.json
-    pet_id = data.get('pet_id')
-    user_id = data.get('user_id')
-    name = data.get('name')
-    dosage = data.get('dosage')
-    description = data.get('description')
-    start_date = data.get('start_date')
-    end_date = data.get('end_date')
-    side_effects = data.get('side_effects')
-    instructions = data.get('instructions')
-    refill = data.get('refill', False)
-
-    if not all([pet_id, user_id, name, dosage, start_date]):
-        return jsonify({'error': 'All fields except end date are required.'}), 400
-    
-    if end_date:
-        try:
-            start_date_dt = datetime.strptime(start_date, '%Y-%m-%d')
-            end_date_dt = datetime.strptime(end_date, '%Y-%m-%d')
-            if end_date_dt < start_date_dt:
-                return jsonify({'error': 'End date cannot be before start date.'}), 400
-        except ValueError:
-            return jsonify({'error': 'Invalid date format. Please use YYYY-MM-DD.'}), 400
+    try:
+        values = validate_medication(request.json)
+    except ValidationError as e:
+        return jsonify({'error': e.message}), e.status
 
-    new_medication = Medication(
-        pet_id=pet_id,
-        user_id=user_id,
-        name=name,
-        dosage=dosage,
-        description=description,
-        start_date=start_date,
-        end_date=end_date,
-        side_effects=side_effects,
-        instructions=instructions,
-        refill=refill
-    )
+    new_medication = Medication(**values)
     
     db.session.add(new_medication)
     db.session.commit()
+    cache.invalidate_user(new_medication.user_id)
 
     return jsonify({'message': 'Medication added successfully'}), 201
 
-@app.route('/medications', methods=['GET'])
+@api.route('/medications/bulk', methods=['POST'])
+def add_medications_bulk():
+    return bulk_import(Medication, validate_medication)
+
+@api.route('/medications', methods=['GET'])
+@replicas.read_only()
+@cache.conditional_response('medications')
+@cache.cached_response('medications')
 def get_medications():
     user_id = request.args.get('user_id', type=int)  
     if user_id is None:
         return jsonify({"error": "user_id is required"}), 400
 
-    medications = get_medications_by_user_id(user_id, db)  
-    response = [
-        {
-            **medication.to_dict(),  
-            "pet_name": pet_name  
-        }
-        for medication, pet_name in medications
-    ]
+    try:
+        list_args = queries.parse_list_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-    return jsonify(response)  
+    page = queries.get_medications_by_user_id(user_id, list_args)
+    return list_response(schemas.medications_out(page.items), page)
 
-@app.route('/medications/<int:medication_id>', methods=['DELETE'])
+@api.route('/medications/<int:medication_id>', methods=['DELETE'])
 def delete_medication(medication_id):
     medication = Medication.query.get(medication_id)
     if medication is None:
         return jsonify({'message': 'Medication not found'}), 404
+    user_id = medication.user_id
+    reminders.forget_medication(medication_id)
     db.session.delete(medication)
     db.session.commit()
+    cache.invalidate_user(user_id)
     return jsonify({'message': 'Medication deleted successfully'}), 200
 
-@app.route('/medications/<int:medication_id>', methods=['PUT'])
+MEDICATION_UPDATE_FIELDS = ('name', 'dosage', 'description', 'pet_id', 'side_effects', 'instructions', 'refill')
+DATE_ORDER_ERROR = 'End date cannot be before start date.'
+
+@api.route('/medications/<int:medication_id>', methods=['PUT'])
 def update_medication(medication_id):
     data = request.json
-    print("Updating medication with ID:", medication_id)
-    print("Received data:", data)
-
-    medication = Medication.query.get_or_404(medication_id)
-
-    print("Current medication state before update:", {
-        'name': medication.name,
-        'dosage': medication.dosage,
-        'description': medication.description,
-        'start_date': medication.start_date,
-        'end_date': medication.end_date,
-        'side_effects': medication.side_effects,
-        'instructions': medication.instructions,
-        'refill': medication.refill,
-        'pet_id': medication.pet_id,
-    })
-
-    medication.name = data['name']
-    medication.dosage = data['dosage']
-    medication.description = data['description']
-    medication.start_date = data['start_date']
-    medication.pet_id = data['pet_id']
-    
-    end_date_input = data.get('end_date')
-    medication.end_date = None if end_date_input == "Ongoing" else end_date_input
-
-    medication.side_effects = data['side_effects']
-    medication.instructions = data['instructions']
-    medication.refill = data['refill']
-
-    if medication.start_date:
-        try:
-            start_date_dt = datetime.strptime(medication.start_date, '%Y-%m-%d')
-            if medication.end_date:  
-                end_date_dt = datetime.strptime(medication.end_date, '%Y-%m-%d')
-                if end_date_dt < start_date_dt:
-                    return jsonify({'error': 'End date cannot be before start date.'}), 400
-        except ValueError:
-            return jsonify({'error': 'Invalid date format. Please use YYYY-MM-DD.'}), 400
+    instrumentation.log_event('medication.update', medication_id=medication_id, fields=sorted(data))
+    values = {field: data[field] for field in MEDICATION_UPDATE_FIELDS if field in data}
 
+    # When only one end of the course is sent, the other is checked in the
+    # UPDATE's WHERE clause against the stored value.
+    order_check = ()
+    try:
+        if data.get('start_date'):
+            values['start_date'] = parse_date(data['start_date'])
+        if 'end_date' in data:
+            if data['end_date'] in (None, '', 'Ongoing'):
+                raise ValidationError(END_DATE_REQUIRED)
+            values['end_date'] = parse_date(data['end_date'])
+        start_date, end_date = values.get('start_date'), values.get('end_date')
+        if start_date and end_date:
+            if end_date < start_date:
+                raise ValidationError(DATE_ORDER_ERROR)
+        elif start_date and 'end_date' not in values:
+            order_check = (Medication.end_date >= start_date,)
+        elif end_date:
+            order_check = (Medication.start_date <= end_date,)
+
+        medication = updates.update_returning(
+            Medication, medication_id, values, (Medication.user_id, Medication.version), order_check,
+        )
+        if medication is None:
+            updates.explain_no_match(Medication, medication_id, DATE_ORDER_ERROR if order_check else None)
+    except ValidationError as e:
+        return jsonify({'error': e.message}), e.status
+
+    if values.keys() & {'pet_id', 'end_date', 'refill'}:
+        reminders.forget_medication(medication_id)
     db.session.commit()
-    return jsonify({'message': 'Medication updated successfully'}), 200
+    cache.invalidate_user(medication.user_id)
+    return updates.with_version(jsonify({'message': 'Medication updated successfully'}), medication.version)
+
+@api.route('/reminders', methods=['GET'])
+@replicas.read_only()
+def get_reminders():
+    user_id = request.args.get('user_id', type=int)
+    if user_id is None:
+        return jsonify({'error': 'user_id is required'}), 400
+    today = datetime.utcnow().date()
+    return schemas.json_response(schemas.reminders_out(queries.get_upcoming_reminders_by_user_id(user_id, today)))
 
-@app.route('/pets/<int:pet_id>', methods=['GET'])
+@api.route('/pets/<int:pet_id>', methods=['GET'])
 def get_pet(pet_id):
-    print(f"Fetching pet with ID: {pet_id}")  
-    pet = Pet.query.get(pet_id)
+    pet = queries.get_pet(pet_id)
     if pet is None:
-        print(f"Pet with ID {pet_id} not found.")  
+        instrumentation.log_event('pet.not_found', pet_id=pet_id)
         return jsonify({'error': 'Pet not found'}), 404
-    return jsonify(pet.to_dict()), 200
+    return updates.with_version(schemas.json_response(schemas.PetOut(*pet)), pet.version), 200
 
-@app.route('/billing', methods=['POST'])
+@api.route('/billing', methods=['POST'])
 def add_billing():
-    data = request.json
-    user_id = data.get('user_id')
-    pet_id = data.get('pet_id')
-    billing_type = data.get('type')
-    price = data.get('price')
-    description = data.get('description')
-    date = data.get('date')
-
-    if not all([pet_id, billing_type, price, description, user_id]):
-        return jsonify({'error': 'All fields are required.'}), 400
+    try:
+        values = validate_billing(request.json)
+    except ValidationError as e:
+        return jsonify({'error': e.message}), e.status
 
-    pet = Pet.query.filter_by(id=pet_id).first()
+    pet = Pet.query.filter_by(id=values['pet_id']).first()
     if not pet:
         return jsonify({'error': 'Pet not found.'}), 404
 
-    new_billing = Billing(
-        user_id=user_id,
-        pet_id=pet_id,
-        type=billing_type,
-        price=price,
-        description=description,
-        date=date,
-        created_at=datetime.utcnow()
-    )
+    new_billing = Billing(**values, created_at=datetime.utcnow())
 
     db.session.add(new_billing)
+    reports.apply_billing([new_billing])
     db.session.commit()
+    cache.invalidate_user(new_billing.user_id)
 
     response_data = {
         'id': new_billing.id,
@@ -385,72 +471,118 @@ def add_billing():
         'type': new_billing.type,
         'price': new_billing.price,
         'description': new_billing.description,
-        'date': new_billing.date,
+        'date': new_billing.date.strftime('%Y-%m-%d'),
         'created_at': new_billing.created_at.isoformat(),
         'pet_name': pet.name 
     }
 
-    print(f"Billing added: {new_billing}")  
-    return jsonify(response_data), 201
+    instrumentation.log_event('billing.added', billing_id=new_billing.id, user_id=new_billing.user_id)
+    return schemas.json_response(response_data, 201)
 
-@app.route('/billing', methods=['GET'])
+@api.route('/billing/bulk', methods=['POST'])
+def add_billing_bulk():
+    return bulk_import(Billing, validate_billing, defaults={'created_at': datetime.utcnow},
+                       after_insert=reports.apply_billing)
+
+@api.route('/billing', methods=['GET'])
+@replicas.read_only()
+@cache.conditional_response('billing')
+@cache.cached_response('billing')
 def get_billing():
     user_id = request.args.get('user_id')
-    billing_entries = Billing.query.filter_by(user_id=user_id).all()
-    
-    results = [{
-        'id': entry.id,
-        'user_id': entry.user_id,
-        'pet_id': entry.pet_id,
-        'type': entry.type,
-        'price': entry.price,
-        'description': entry.description,
-        'date': entry.date.strftime('%Y-%m-%d'),  
-        'pet_name': entry.pet.name  
-    } for entry in billing_entries]
-
-    return jsonify(results)
-
-@app.route('/billing/<int:billing_id>', methods=['DELETE'])
+    try:
+        list_args = queries.parse_list_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    page = queries.get_billing_by_user_id(user_id, list_args)
+    return list_response(schemas.billing_out(page.items), page)
+
+# Totals per pet, type or month (YYYY-MM) over an optional start/end range.
+@api.route('/billing/summary', methods=['GET'])
+@replicas.read_only()
+@cache.conditional_response('billing-summary')
+@cache.cached_response('billing-summary')
+def get_billing_summary():
+    group_by = request.args.get('group_by', 'type')
+    try:
+        user_id = parse_int(request.args.get('user_id'), 'user_id')
+        list_args = queries.parse_list_args(request.args)
+    except ValidationError as e:
+        return jsonify({'error': e.message}), e.status
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if group_by not in reports.GROUPINGS:
+        return jsonify({'error': f"group_by must be one of: {', '.join(reports.GROUPINGS)}"}), 400
+
+    rows = reports.billing_summary(user_id, group_by, list_args.start, list_args.end)
+    return schemas.json_response(schemas.billing_summary_out(rows))
+
+@api.route('/billing/<int:billing_id>', methods=['DELETE'])
 def delete_billing(billing_id):
     billing_entry = Billing.query.get(billing_id)
     if billing_entry is None:
         return jsonify({'message': 'Billing entry not found'}), 404
 
+    user_id = billing_entry.user_id
+    reports.apply_billing([billing_entry], sign=-1)
     db.session.delete(billing_entry)
     db.session.commit()
+    cache.invalidate_user(user_id)
 
     return jsonify({'message': 'Billing entry deleted successfully'}), 200
 
-@app.route('/billing/<int:billing_id>', methods=['PUT'])
+BILLING_RETURNING = (
+    Billing.id, Billing.user_id, Billing.pet_id, Billing.type, Billing.price, Billing.description,
+    Billing.date, select(Pet.name).where(Pet.id == Billing.pet_id).scalar_subquery().label('pet_name'),
+    Billing.version,
+)
+
+@api.route('/billing/<int:billing_id>', methods=['PUT'])
 def update_billing(billing_id):
     data = request.json
-    print("Updating billing entry with ID:", billing_id)
-    print("Received data:", data)
-    billing_entry = Billing.query.get_or_404(billing_id)
-
-    billing_entry.pet_id = data.get('pet_id', billing_entry.pet_id)  
-    billing_entry.type = data['type']  
-    billing_entry.price = data['price']  
-    billing_entry.description = data['description']  
-    billing_entry.date = data['date']  
+    values = {field: data[field] for field in ('pet_id', 'type', 'description') if field in data}
+    try:
+        if 'price' in data:
+            values['price'] = parse_price(data['price'])
+        if 'date' in data:
+            values['date'] = parse_date(data['date'])
+
+        # The rollup needs the entry's old amount, type and month; lock the
+        # row while it is read so they can't change before the UPDATE.
+        previous = None
+        if reports.rollup_enabled():
+            previous = queries.read_one(
+                select(Billing.user_id, Billing.pet_id, Billing.type, Billing.price, Billing.date)
+                .where(Billing.id == billing_id)
+                .with_for_update()
+            )
+        billing_entry = updates.update_returning(Billing, billing_id, values, BILLING_RETURNING)
+        if billing_entry is None:
+            updates.explain_no_match(Billing, billing_id)
+    except ValidationError as e:
+        return jsonify({'error': e.message}), e.status
+
+    if previous is not None:
+        reports.apply_billing([previous._asdict()], sign=-1)
+        reports.apply_billing([billing_entry._asdict()])
 
     db.session.commit()
-    response_data = {
-        'id': billing_entry.id,
-        'user_id': billing_entry.user_id,
-        'pet_id': billing_entry.pet_id,
-        'type': billing_entry.type,
-        'price': billing_entry.price,
-        'description': billing_entry.description,
-        'date': billing_entry.date.strftime('%Y-%m-%d'),  
-        'pet_name': billing_entry.pet.name  
-    }
+    cache.invalidate_user(billing_entry.user_id)
+    response_data = billing_entry._asdict()
+    response_data['date'] = billing_entry.date.strftime('%Y-%m-%d')
 
-    print(f"Billing updated: {response_data}")  
-    return jsonify({'message': 'Billing entry updated successfully', 'billing': response_data}), 200
+    instrumentation.log_event('billing.updated', billing_id=billing_id, fields=sorted(data))
+    response = schemas.json_response({'message': 'Billing entry updated successfully', 'billing': response_data})
+    return updates.with_version(response, billing_entry.version)
 
-@app.route('/appointments', methods=['POST'])
+def vet_is_booked(vet_id, date, time, exclude_id=None):
+    # Held until the booking commits, so the answer stays true until then.
+    queries.lock_vet_schedule(vet_id)
+    slot_minutes = current_app.config['APPOINTMENT_SLOT_MINUTES']
+    return queries.find_conflicting_appointment(vet_id, date, time, slot_minutes, exclude_id) is not None
+
+@api.route('/appointments', methods=['POST'])
 def add_appointment():
     data = request.json
     user_id = data.get('user_id')
@@ -466,194 +598,368 @@ def add_appointment():
         return jsonify({'error': 'All fields are required.'}), 400
 
     try:
-        datetime.strptime(date, '%Y-%m-%d')  
+        date_obj = datetime.strptime(date, '%Y-%m-%d').date()
     except ValueError:
         return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD.'}), 400
 
     try:
-        datetime.strptime(time, '%H:%M')  
+        time_obj = datetime.strptime(time, '%H:%M').time()
     except ValueError:
         return jsonify({'error': 'Invalid time format. Use HH:MM.'}), 400
+
+    if vet_is_booked(vet_id, date_obj, time_obj):
+        return jsonify({'error': 'The vet already has an appointment at that time.'}), 409
       
     new_appointment = Appointment(
         user_id=user_id,
         pet_id=pet_id,
         vet_id=vet_id,
         reason=reason,
-        date=date,
-        time=time,
+        date=date_obj,
+        time=time_obj,
         location=location,
         notes=notes
     )
 
     db.session.add(new_appointment)
     db.session.commit()
+    cache.invalidate_user(new_appointment.user_id)
+    availability.invalidate(new_appointment.vet_id)
 
     return jsonify({'message': 'Appointment added successfully'}), 201
 
 
-@app.route('/medicalrecords', methods=['POST'])
+@api.route('/medicalrecords', methods=['POST'])
 def add_record():
-    data = request.json
-    pet_id = data.get('pet_id')
-    user_id = data.get('user_id')
-    name = data.get('name')
-    date = data.get('date')
-    description = data.get('description')  
-    vet_id = data.get('vet_id')
-    record_type = data.get('record_type')
-
-    if not all([pet_id, user_id, name, date, record_type, vet_id, description]):
-        return jsonify({'error': 'All fields are required.'}), 400
-
     try:
-        date_obj = datetime.strptime(date, '%Y-%m-%d').date()
-    except ValueError:
-        return jsonify({'error': 'Invalid date format. Please use YYYY-MM-DD.'}), 401
+        values = validate_record(request.json)
+    except ValidationError as e:
+        return jsonify({'error': e.message}), e.status
 
-    new_record = Record(
-        pet_id=pet_id,
-        user_id=user_id,
-        name=name,
-        date=date_obj,
-        description=description,
-        vet_id=vet_id,
-        record_type=record_type
-    )
+    new_record = Record(**values)
 
     db.session.add(new_record)
     db.session.commit()
+    cache.invalidate_user(new_record.user_id)
 
     return jsonify({'message': 'Record added successfully', 'record': new_record.to_dict()}), 201
+
+@api.route('/medicalrecords/bulk', methods=['POST'])
+def add_records_bulk():
+    return bulk_import(Record, validate_record)
      
-@app.route('/medicalrecords', methods=['GET'])
+@api.route('/medicalrecords', methods=['GET'])
+@replicas.read_only()
+@cache.conditional_response('medicalrecords')
 def get_medical_records_by_user():
     user_id = request.args.get('user_id')
     
     if not user_id:
         return jsonify({'error': 'User ID is required'}), 400
+
+    try:
+        list_args = queries.parse_list_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    records = Record.query.filter_by(user_id=user_id).all()
-    
-    results = [{
-        'id': record.id,
-        'pet_id': record.pet_id,
-        'pet_name': record.pet.name,  
-        'name': record.name,
-        'date': record.date.strftime('%Y-%m-%d'),
-        'description': record.description,
-        'vet_id': record.vet.id,
-        'vet_name': record.vet.name,  
-        'record_type': record.record_type,
-    } for record in records]
-
-    return jsonify(results), 200
-
-@app.route('/medicalrecords/<int:record_id>', methods=['PUT'])
+    page = queries.get_records_by_user_id(user_id, list_args)
+    return list_response(schemas.records_out(page.items), page)
+
+@api.route('/medicalrecords/<int:record_id>', methods=['PUT'])
 def update_record(record_id):
     data = request.json
-    print('Received data:', data)
-    record = Record.query.get_or_404(record_id)
-
-    record.name = data.get('name', record.name)
-    record.date = data.get('date', record.date)
-    record.description = data.get('description', record.description)
-    record.vet_id = data.get('vet_id', record.vet_id)
-    record.record_type = data.get('record_type', record.record_type)
-    record.pet_id = data.get('pet_id', record.pet_id)  
-
+    instrumentation.log_event('record.update', record_id=record_id, fields=sorted(data))
+    values = {
+        field: data[field] for field in ('name', 'description', 'vet_id', 'record_type', 'pet_id') if field in data
+    }
     try:
         if 'date' in data:
-            date_obj = datetime.strptime(data['date'], '%Y-%m-%d').date()
-            record.date = date_obj
-    except ValueError:
-        return jsonify({'error': 'Invalid date format. Please use YYYY-MM-DD.'}), 400
+            values['date'] = parse_date(data['date'])
+        record = updates.update_returning(Record, record_id, values, (
+            Record.id, Record.user_id, Record.pet_id, Record.vet_id, Record.name, Record.date,
+            Record.description, Record.record_type, Record.version,
+        ))
+        if record is None:
+            updates.explain_no_match(Record, record_id)
+    except ValidationError as e:
+        return jsonify({'error': e.message}), e.status
 
     db.session.commit()
-    return jsonify({'message': 'Record updated successfully', 'record': record.to_dict()}), 200
-
-@app.route('/medicalrecords/<int:record_id>', methods=['DELETE'])
+    cache.invalidate_user(record.user_id)
+    record_data = record._asdict()
+    record_data['date'] = record.date.isoformat()
+    del record_data['version']
+    response = jsonify({'message': 'Record updated successfully', 'record': record_data})
+    return updates.with_version(response, record.version)
+
+@api.route('/medicalrecords/<int:record_id>', methods=['DELETE'])
 def delete_record(record_id):
      record = Record.query.get(record_id)
      if not record:
          return jsonify({'message': 'Record not found'}), 404
 
+     user_id = record.user_id
      db.session.delete(record)
      db.session.commit()
+     cache.invalidate_user(user_id)
 
      return jsonify({'message': 'Record deleted successfully'}), 200
 
 
-@app.route('/appointments', methods=['GET'])
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+# Ranked keyword search over the user's medical records and medications and
+# the vet directory. Pages are addressed by an offset carried in X-Next-Cursor.
+@api.route('/search', methods=['GET'])
+@replicas.read_only()
+def search_history():
+    terms = request.args.get('q')
+    try:
+        user_id = parse_int(request.args.get('user_id'), 'user_id')
+        limit = parse_int(request.args.get('limit', SEARCH_DEFAULT_LIMIT), 'limit')
+        offset = parse_int(request.args.get('cursor', 0), 'cursor')
+    except ValidationError as e:
+        return jsonify({'error': e.message}), e.status
+    if not search.has_terms(terms):
+        return jsonify({'error': 'q is required'}), 400
+    if not 1 <= limit <= SEARCH_MAX_LIMIT:
+        return jsonify({'error': f'limit must be between 1 and {SEARCH_MAX_LIMIT}.'}), 400
+    if offset < 0:
+        return jsonify({'error': 'Invalid cursor.'}), 400
+
+    hits, more = search.search(terms, user_id, limit, offset)
+    page = queries.Page(hits, str(offset + limit) if more else None)
+    return list_response(schemas.search_hits_out(hits), page)
+
+@api.route('/export', methods=['GET'])
+@replicas.read_only()
+def export_history():
+    user_id = request.args.get('user_id', type=int)
+    if user_id is None:
+        return jsonify({'error': 'user_id is required'}), 400
+    pet_id = request.args.get('pet_id', type=int)
+
+    tables = request.args.get('tables')
+    if tables:
+        tables = tables.split(',')
+        unknown = [t for t in tables if t not in export.EXPORT_TABLES]
+        if unknown:
+            return jsonify({'error': f"Unknown tables: {', '.join(unknown)}"}), 400
+
+    export_format = request.args.get('format', 'ndjson')
+    rows = export.export_rows(user_id, pet_id, tables)
+    if export_format == 'ndjson':
+        body, mimetype = export.ndjson_lines(rows), 'application/x-ndjson'
+    elif export_format == 'csv':
+        body, mimetype = export.csv_lines(rows, tables), 'text/csv'
+    else:
+        return jsonify({'error': 'format must be ndjson or csv'}), 400
+
+    filename = f'ninerpets-export-{user_id}.{export_format}'
+    headers = {'Content-Disposition': f'attachment; filename={filename}', 'Vary': 'Accept-Encoding'}
+    # ?gzip=1/0 overrides what the client's Accept-Encoding asks for.
+    compress = request.args.get('gzip')
+    compress = parse_bool(compress) if compress is not None else request.accept_encodings['gzip'] > 0
+    if compress:
+        body = export.gzip_chunks(body)
+        headers['Content-Encoding'] = 'gzip'
+
+    return Response(stream_with_context(body), mimetype=mimetype, headers=headers)
+
+@api.route('/appointments', methods=['GET'])
+@replicas.read_only()
+@cache.conditional_response('appointments')
 def get_appointments():
     user_id = request.args.get('user_id')
     if not user_id:
         return jsonify({"error": "user_id is required"}), 400
 
     try:
-        # Assuming you have some database query to fetch appointments
-        appointments = Appointment.query.filter_by(user_id=user_id).all()
-        
-        results = [{
-            'id': appointment.id,
-            'user_id': appointment.user_id,
-            'pet_id': appointment.pet_id,
-            'date': appointment.date.strftime('%Y-%m-%d'),  # Ensure this is a valid date
-            'vet_id': appointment.vet_id,
-            'reason': appointment.reason,
-            'time': appointment.time.strftime('%H:%M') if appointment.time else "No time set",
-            'location' : appointment.location,
-            'notes' : appointment.notes
-
-        } for appointment in appointments]
-
-        return jsonify(results)
+        list_args = queries.parse_list_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        page = queries.get_appointments_by_user_id(user_id, list_args)
+        return list_response(schemas.appointments_out(page.items), page)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
-@app.route('/appointments/<int:appointment_id>', methods=['DELETE'])
+@api.route('/appointments/range', methods=['GET'])
+@replicas.read_only()
+@cache.conditional_response('appointments-range')
+def get_appointments_in_range():
+    user_id = request.args.get('user_id')
+    if not user_id:
+        return jsonify({"error": "user_id is required"}), 400
+
+    try:
+        list_args = queries.parse_list_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not list_args.start or not list_args.end:
+        return jsonify({'error': 'start and end are required.'}), 400
+
+    page = queries.get_appointments_by_user_id(user_id, list_args)
+    return list_response(schemas.appointments_out(page.items), page)
+
+@api.route('/appointments/<int:appointment_id>', methods=['DELETE'])
 def delete_appointment(appointment_id):
     appointment = Appointment.query.get(appointment_id)
     if not appointment:
         return jsonify({'error': 'Appointment not found'}), 404
 
+    user_id = appointment.user_id
+    vet_id = appointment.vet_id
     db.session.delete(appointment)
     db.session.commit()
+    cache.invalidate_user(user_id)
+    availability.invalidate(vet_id)
 
     return jsonify({'message': 'Appointment deleted successfully'}), 200
 
-@app.route('/appointments/<int:appointment_id>', methods=['PUT'])
+@api.route('/appointments/<int:appointment_id>', methods=['PUT'])
 def update_appointment(appointment_id):
     data = request.json
-    appointment = Appointment.query.get_or_404(appointment_id)
-
-    # Update appointment fields only if they are present in the request
-    appointment.user_id = data.get('user_id', appointment.user_id)
-    appointment.pet_id = data.get('pet_id', appointment.pet_id)
-    appointment.vet_id = data.get('vet_id', appointment.vet_id)
-    appointment.reason = data.get('reason', appointment.reason)
-    appointment.date = data.get('date', appointment.date)
-    appointment.time = data.get('time', appointment.time)
-    appointment.location = data.get('location', appointment.location)
-    appointment.notes = data.get('notes', appointment.notes)
-
+    values = {
+        field: data[field] for field in ('user_id', 'pet_id', 'vet_id', 'reason', 'location', 'notes') if field in data
+    }
     # Validate date and time if they are updated
     if data.get('date'):
         try:
-            datetime.strptime(data['date'], '%Y-%m-%d')
+            values['date'] = datetime.strptime(data['date'], '%Y-%m-%d').date()
         except ValueError:
             return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD.'}), 400
-
     if data.get('time'):
         try:
-            datetime.strptime(data['time'], '%H:%M')
+            values['time'] = datetime.strptime(data['time'], '%H:%M').time()
         except ValueError:
             return jsonify({'error': 'Invalid time format. Use HH:MM.'}), 400
 
+    # Moving the appointment (or handing it to another user) needs the current
+    # slot for the clash check and cache invalidation: read it, locked, first.
+    # Anything else is a single UPDATE.
+    previous = None
+    if values.keys() & {'user_id', 'vet_id', 'date', 'time'}:
+        previous = queries.read_one(
+            select(Appointment.user_id, Appointment.vet_id, Appointment.date, Appointment.time)
+            .where(Appointment.id == appointment_id)
+            .with_for_update()
+        )
+        if previous is None:
+            abort(404)
+        vet_id = values.get('vet_id', previous.vet_id)
+        slot = (values.get('date', previous.date), values.get('time', previous.time))
+        if vet_is_booked(vet_id, *slot, exclude_id=appointment_id):
+            return jsonify({'error': 'The vet already has an appointment at that time.'}), 409
+
+    try:
+        appointment = updates.update_returning(Appointment, appointment_id, values, (
+            Appointment.user_id, Appointment.vet_id, Appointment.date, Appointment.version,
+        ))
+        if appointment is None:
+            updates.explain_no_match(Appointment, appointment_id)
+    except ValidationError as e:
+        return jsonify({'error': e.message}), e.status
+
     db.session.commit()
-    return jsonify({'message': 'Appointment updated successfully'}), 200
+    cache.invalidate_user(appointment.user_id)
+    if previous is not None:
+        if previous.user_id != appointment.user_id:
+            cache.invalidate_user(previous.user_id)
+        availability.invalidate(previous.vet_id, appointment.vet_id)
+    response = jsonify({'message': 'Appointment updated successfully'})
+    return updates.with_version(response, appointment.version)
+
+instrumentation.collected.update({
+    'ninerpets_cache_hits_total': ('counter', 'Response cache hits.', lambda: cache.stats['hits']),
+    'ninerpets_cache_misses_total': ('counter', 'Response cache misses.', lambda: cache.stats['misses']),
+    'ninerpets_cache_not_modified_total': ('counter', '304 answers from ETags.', lambda: cache.stats['not_modified']),
+    'ninerpets_identity_cache_size': ('gauge', 'Cached user identities.', lambda: identity.user_cache.info()['size']),
+    'ninerpets_identity_cache_hits_total': ('counter', 'User lookups answered by the identity cache.', lambda: identity.user_cache.stats['hits']),
+    'ninerpets_identity_cache_misses_total': ('counter', 'User lookups that went to the database.', lambda: identity.user_cache.stats['misses']),
+    'ninerpets_identity_from_token_total': ('counter', 'User identities read from the JWT claims alone.', lambda: identity.stats['from_token']),
+    'ninerpets_availability_slot_cache_hits_total': ('counter', 'Vet-days of free slots served from the cache.', lambda: availability.stats['hits']),
+    'ninerpets_availability_slot_cache_misses_total': ('counter', 'Vet-days of free slots computed from bookings.', lambda: availability.stats['misses']),
+    'ninerpets_medication_reminders_created_total': ('counter', 'Reminders written by this process.', lambda: reminders.stats['created']),
+    'ninerpets_medication_reminder_failures_total': ('counter', 'Failed scheduled reminder scans.', lambda: reminders.stats['failures']),
+    'ninerpets_replica_reads_total': ('counter', 'Read-only requests sent to a replica.', lambda: replicas.stats['replica']),
+    'ninerpets_replica_sticky_reads_total': ('counter', 'Read-only requests kept on the primary after a recent write.', lambda: replicas.stats['sticky']),
+    'ninerpets_replica_unshared_reads_total': ('counter', 'Read-only requests kept on the primary for lack of a shared cache.', lambda: replicas.stats['unshared']),
+})
+
+@api.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(instrumentation.render(), mimetype='text/plain; version=0.0.4')
+
+@api.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify({
+        'backend': type(cache.backend).__name__,
+        **cache.stats,
+        'identity': {**identity.user_cache.info(), **identity.stats},
+        'availability': availability.stats,
+        'replicas': replicas.stats,
+    }), 200
+
+@api.cli.command('rebuild-billing-rollup')
+def rebuild_billing_rollup():
+    """Recompute the billing_monthly rollup from the billing table."""
+    print(f'billing_monthly: {reports.rebuild_rollup()} rows')
+
+@api.cli.command('medication-reminders')
+@click.option('--every', type=int, help='Keep running, scanning every this many seconds.')
+def medication_reminders(every):
+    """Write refill / end-of-course reminders for medications ending soon."""
+    days = current_app.config['MEDICATION_REMINDER_DAYS']
+    while True:
+        scanned, created = reminders.scan(days)
+        print(f'medications ending within {days} days: {scanned}, new reminders: {created}')
+        if not every:
+            break
+        time.sleep(every)
+
+@api.cli.command('explain-indexes')
+def explain_indexes():
+    """Check that the hot per-user / per-pet queries are served by an index."""
+    missing = 0
+    for label, index_name, uses_index, plan in queries.explain_hot_queries():
+        print(f"{'ok' if uses_index else 'MISSING':8} {label:24} {index_name}")
+        if not uses_index:
+            missing += 1
+            print('         ' + plan.replace('\n', '\n         '))
+    if missing:
+        raise SystemExit(1)
+
+def create_app(config=None):
+    """App factory. `config` is a config class, a name from config.CONFIGS, or
+    None to use FLASK_CONFIG (default 'development').
+
+    Production: gunicorn -c gunicorn.conf.py "app:create_app('production')"
+    CLI and other WSGI servers: wsgi.py builds the app from FLASK_CONFIG.
+    """
+    if config is None or isinstance(config, str):
+        config = CONFIGS[config or os.getenv('FLASK_CONFIG', 'development')]
+
+    app = Flask(__name__)
+    app.config.from_object(config)
+
+    jwt.init_app(app)
+    db.init_app(app)
+    instrumentation.init_app(app)
+    migrate.init_app(app, db)
+    reminders.init_app(app)
+    passwords.init_app(app)
+
+    CORS(app, resources={r"/*": {"origins": app.config['CORS_ORIGINS']}}, supports_credentials=True,
+         expose_headers=['X-Next-Cursor', 'ETag', 'Last-Modified'])
+
+    app.register_blueprint(api)
+    return app
 
 if __name__ == '__main__':
+    app = create_app()
     with app.app_context():
         db.create_all()  # Create the database tables if they don't exist
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=app.config['DEBUG'])
\ No newline at end of file
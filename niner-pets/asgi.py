@@ -0,0 +1,140 @@
+"""ASGI entry point for the async deployment mode.
+
+    uvicorn asgi:app --workers 4 --port 5000
+
+The read-heavy list endpoints (GET /vets, /pets, /medications, /billing,
+/medicalrecords, /appointments) are served natively: their queries run on an
+AsyncSession-style async engine (asyncpg for Postgres, aiosqlite for SQLite),
+so a worker keeps serving other requests while one waits on the database.
+Every other request is handed to the regular Flask app, so the URL contract
+and JSON shapes are identical in both modes.
+"""
+import os, json
+from urllib.parse import parse_qsl
+from asgiref.wsgi import WsgiToAsgi
+from sqlalchemy.ext.asyncio import create_async_engine
+from werkzeug.datastructures import MultiDict
+import queries, schemas
+from app import create_app
+from config import async_database_url, async_engine_options
+
+flask_app = create_app(os.getenv('FLASK_CONFIG', 'production'))
+wsgi_app = WsgiToAsgi(flask_app)
+
+database_url = flask_app.config['SQLALCHEMY_DATABASE_URI']
+engine = create_async_engine(async_database_url(database_url), **async_engine_options(database_url))
+
+class HTTPError(Exception):
+    def __init__(self, status, payload):
+        self.status = status
+        self.payload = payload
+
+async def fetch_page(list_query, list_args):
+    async with engine.connect() as conn:
+        result = await conn.execute(queries.page_statement(list_query, list_args))
+        rows = result.all()
+    return queries.to_page(rows, list_query, list_args)
+
+def list_args_from(args):
+    try:
+        return queries.parse_list_args(args)
+    except ValueError as e:
+        raise HTTPError(400, {'error': str(e)})
+
+def required_user_id(args, message):
+    user_id = args.get('user_id')
+    if not user_id:
+        raise HTTPError(400, {'error': message})
+    return user_id
+
+# Each handler mirrors the validation and responses of its Flask route.
+async def get_vets(args):
+    page = await fetch_page(queries.vets_list(), list_args_from(args))
+    return schemas.vets_out(page.items), page
+
+async def get_pets(args):
+    user_id = args.get('user_id')
+    if user_id and user_id.lower() == 'null':
+        raise HTTPError(400, {'error': 'Invalid User ID'})
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        raise HTTPError(400, {'error': 'User ID must be a valid integer'})
+    page = await fetch_page(queries.pets_list(user_id), list_args_from(args))
+    if not page.items:
+        raise HTTPError(404, {'message': 'No pets found for this user'})
+    return schemas.pets_out(page.items), page
+
+async def get_medications(args):
+    try:
+        user_id = int(args.get('user_id'))
+    except (TypeError, ValueError):
+        raise HTTPError(400, {'error': 'user_id is required'})
+    page = await fetch_page(queries.medications_list(user_id), list_args_from(args))
+    return schemas.medications_out(page.items), page
+
+async def get_billing(args):
+    page = await fetch_page(queries.billing_list(args.get('user_id')), list_args_from(args))
+    return schemas.billing_out(page.items), page
+
+async def get_medical_records(args):
+    user_id = required_user_id(args, 'User ID is required')
+    page = await fetch_page(queries.records_list(user_id), list_args_from(args))
+    return schemas.records_out(page.items), page
+
+async def get_appointments(args):
+    user_id = required_user_id(args, 'user_id is required')
+    page = await fetch_page(queries.appointments_list(user_id), list_args_from(args))
+    return schemas.appointments_out(page.items), page
+
+ASYNC_ROUTES = {
+    '/vets': get_vets,
+    '/pets': get_pets,
+    '/medications': get_medications,
+    '/billing': get_billing,
+    '/medicalrecords': get_medical_records,
+    '/appointments': get_appointments,
+}
+
+def cors_headers(scope):
+    origin = next((v.decode() for k, v in scope['headers'] if k == b'origin'), None)
+    if origin not in flask_app.config['CORS_ORIGINS']:
+        return []
+    return [
+        (b'access-control-allow-origin', origin.encode()),
+        (b'access-control-allow-credentials', b'true'),
+        (b'access-control-expose-headers', b'X-Next-Cursor'),
+        (b'vary', b'Origin'),
+    ]
+
+async def handle_list(handler, scope, send):
+    args = MultiDict(parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True))
+    headers = [(b'content-type', b'application/json')] + cors_headers(scope)
+    try:
+        payload, page = await handler(args)
+        status, body = 200, schemas.encoder.encode(payload)
+        if page.next_cursor:
+            headers.append((b'x-next-cursor', page.next_cursor.encode()))
+    except HTTPError as e:
+        status, body = e.status, json.dumps(e.payload).encode()
+    headers.append((b'content-length', str(len(body)).encode()))
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await engine.dispose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    handler = ASYNC_ROUTES.get(scope.get('path'))
+    if scope['type'] == 'http' and scope['method'] == 'GET' and handler is not None:
+        return await handle_list(handler, scope, send)
+    return await wsgi_app(scope, receive, send)
@@ -0,0 +1,126 @@
+import os
+from datetime import datetime, timedelta
+from itertools import groupby
+from flask import current_app, request
+import cache, queries
+
+# Free appointment slots per vet and day. Candidate slots start at the opening
+# time and step by APPOINTMENT_SLOT_MINUTES; a slot is taken when an existing
+# appointment for the vet starts less than one slot away (the same rule the
+# booking conflict check applies).
+#
+# Each vet/day result is cached on its own, so a request for a week only reads
+# the days not already cached, with one sorted range scan over the
+# (vet_id, date, time) index. The keys embed the vet's cache generation (see
+# cache.py), and appointment writes bump the generations of the vets they
+# touch. The generation is read before the bookings, so slots computed from
+# bookings that a write has since changed are stored under the old number,
+# where no later lookup reads them. Like the response cache, slots are only
+# cached when cache.enabled(): a per-process cache would keep serving a day
+# another worker just booked.
+
+SLOTS_TTL = int(os.getenv('CACHE_SLOTS_TTL', 600))
+
+stats = {'hits': 0, 'misses': 0}
+
+def _hours():
+    config = current_app.config
+    return (
+        datetime.strptime(config['VET_DAY_START'], '%H:%M').time(),
+        datetime.strptime(config['VET_DAY_END'], '%H:%M').time(),
+        config['APPOINTMENT_SLOT_MINUTES'],
+        config['VET_WORKING_DAYS'],
+    )
+
+def vet_scope(vet_id):
+    return f'vet:{vet_id}'
+
+def vet_scopes():
+    """Replica scopes of an availability request, one per vet in ?vet_id. A
+    booking bumps its vet's scope, so lookups of that vet stay on the primary
+    for REPLICA_STICKY_SECONDS after it (replicas.py); other vets' don't."""
+    scopes = []
+    for vet_id in request.args.get('vet_id', '').split(','):
+        try:
+            scopes.append(vet_scope(int(vet_id)))
+        except ValueError:
+            continue
+    return scopes
+
+def _key(vet_id, generation, day):
+    # The working hours are part of the key, so changing them never serves
+    # slots computed under the old ones.
+    config = current_app.config
+    return (f"slots:{vet_id}:{generation}:{day.isoformat()}:{config['VET_DAY_START']}-"
+            f"{config['VET_DAY_END']}:{config['APPOINTMENT_SLOT_MINUTES']}")
+
+def _sweep(day, bookings, opens, closes, slot_minutes):
+    """Free slot start times for one day; `bookings` are sorted times."""
+    slot = timedelta(minutes=slot_minutes)
+    starts = datetime.combine(day, opens)
+    last_start = datetime.combine(day, closes) - slot
+    booked = [datetime.combine(day, booked_time) for booked_time in bookings]
+
+    free = []
+    i = 0
+    while starts <= last_start:
+        # Skip appointments that end at or before this slot starts.
+        while i < len(booked) and booked[i] <= starts - slot:
+            i += 1
+        if i == len(booked) or booked[i] >= starts + slot:
+            free.append(starts.strftime('%H:%M'))
+        starts += slot
+    return free
+
+def free_slots(vet_ids, start, end):
+    """{(vet_id, day): [free 'HH:MM' start times]} for every working day from
+    `start` to `end` inclusive."""
+    opens, closes, slot_minutes, working_days = _hours()
+    days = []
+    day = start
+    while day <= end:
+        if day.weekday() in working_days:
+            days.append(day)
+        day += timedelta(days=1)
+
+    wanted = [(vet_id, day) for vet_id in vet_ids for day in days]
+    if not wanted:
+        return {}
+    use_cache = cache.enabled()
+    if use_cache:
+        generations = cache.generations(vet_scope(vet_id) for vet_id in vet_ids)
+        keys = {(vet_id, day): _key(vet_id, generations[vet_scope(vet_id)], day) for vet_id, day in wanted}
+        cached = cache.backend.get_many(*keys.values())
+    else:
+        cached = [None] * len(wanted)
+    result = {}
+    missing = []
+    for vet_day, slots in zip(wanted, cached):
+        if slots is None:
+            missing.append(vet_day)
+        else:
+            result[vet_day] = slots
+    stats['hits'] += len(wanted) - len(missing)
+    stats['misses'] += len(missing)
+    if not missing:
+        return result
+
+    missing_days = [day for _, day in missing]
+    rows = queries.get_vet_bookings(
+        sorted({vet_id for vet_id, _ in missing}), min(missing_days), max(missing_days)
+    )
+    bookings = {
+        vet_day: [row.time for row in vet_rows]
+        for vet_day, vet_rows in groupby(rows, key=lambda row: (row.vet_id, row.date))
+    }
+    for vet_id, day in missing:
+        result[(vet_id, day)] = _sweep(day, bookings.get((vet_id, day), ()), opens, closes, slot_minutes)
+    if use_cache:
+        cache.backend.set_many({keys[vet_day]: result[vet_day] for vet_day in missing}, timeout=SLOTS_TTL)
+    return result
+
+def invalidate(*vet_ids):
+    """Retire the cached slots of the given vets; call after an appointment
+    write commits."""
+    for vet_id in {vet_id for vet_id in vet_ids if vet_id is not None}:
+        cache.invalidate(vet_scope(vet_id))
@@ -0,0 +1,119 @@
+"""Billing aggregate correctness and speed on synthetic rows.
+
+    python benchmarks/billing_money.py --rows 1000000
+
+Fills a scratch SQLite database (or DATABASE_URL, if given with --database-url)
+with random prices in whole cents for one user, then compares the exact total
+with a plain floating point SUM and with reports.billing_summary(), and times
+the summary and the list serialization. Results are printed as JSON.
+"""
+import argparse, json, os, random, statistics, sys, tempfile, time
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return result, statistics.median(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--serialize-rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--database-url', help='defaults to a scratch SQLite file')
+    args = parser.parse_args()
+
+    scratch = None
+    if not args.database_url:
+        scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        args.database_url = f'sqlite:///{scratch.name}'
+    os.environ['DATABASE_URL'] = args.database_url
+
+    from sqlalchemy import Float, func, insert, select
+    from app import create_app
+    from models import db, User, Pet, Billing
+    import reports, schemas, queries
+
+    app = create_app()
+    rng = random.Random(args.seed)
+    types = ['exam', 'vaccine', 'surgery', 'grooming', 'pharmacy']
+    with app.app_context():
+        db.create_all()
+        user = User(email='bench@uncc.edu', username=f'bench-{time.time_ns()}')
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.flush()
+        pet = Pet(user_id=user.id, name='Bench', species='dog', breed='mixed', dob=date(2015, 1, 1), weight=10)
+        db.session.add(pet)
+        db.session.commit()
+
+        exact_cents = 0
+        start_day = date(2000, 1, 1)
+        inserted = 0
+        load_start = time.perf_counter()
+        while inserted < args.rows:
+            chunk = []
+            for _ in range(min(10_000, args.rows - inserted)):
+                cents = rng.randrange(1, 100_000)
+                exact_cents += cents
+                chunk.append({
+                    'user_id': user.id, 'pet_id': pet.id, 'type': rng.choice(types),
+                    'price': Decimal(cents).scaleb(-2), 'description': 'synthetic',
+                    'date': start_day + timedelta(days=rng.randrange(9000)),
+                })
+            db.session.execute(insert(Billing), chunk)
+            db.session.commit()
+            inserted += len(chunk)
+        load_seconds = time.perf_counter() - load_start
+        exact = Decimal(exact_cents).scaleb(-2)
+
+        float_sum, float_seconds = timed(
+            lambda: db.session.execute(
+                select(func.sum(Billing.price, type_=Float)).where(Billing.user_id == user.id)
+            ).scalar(),
+            args.repeat,
+        )
+        summary, summary_seconds = timed(
+            lambda: reports.billing_summary(user.id, 'type'), args.repeat
+        )
+        summary_total = sum(total for _, _, total, _ in summary)
+
+        rows = queries.read(queries.billing_list(user.id).base.limit(args.serialize_rows))
+        encoded, decimal_seconds = timed(
+            lambda: schemas.encoder.encode(schemas.billing_out(rows)), args.repeat
+        )
+        _, float_encode_seconds = timed(
+            lambda: json.dumps([{**row._asdict(), 'price': float(row.price)} for row in rows], default=str),
+            args.repeat,
+        )
+
+    if scratch:
+        os.unlink(scratch.name)
+
+    print(json.dumps({
+        'rows': args.rows,
+        'database': args.database_url.split(':', 1)[0],
+        'load_seconds': round(load_seconds, 2),
+        'exact_total': str(exact),
+        'float_sum': repr(float_sum),
+        'float_sum_rounded_to_cents_exact': Decimal(float_sum).quantize(Decimal('0.01')) == exact,
+        'float_sum_error': str(Decimal(float_sum) - exact),
+        'float_sum_seconds': round(float_seconds, 4),
+        'summary_total': str(summary_total),
+        'summary_exact': summary_total == exact,
+        'summary_seconds': round(summary_seconds, 4),
+        'serialized_rows': len(rows),
+        'serialized_bytes': len(encoded),
+        'msgspec_decimal_seconds': round(decimal_seconds, 4),
+        'json_float_seconds': round(float_encode_seconds, 4),
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Deleting a pet's history: ORM cascade versus set-based DELETEs.
+
+    python -m benchmarks.delete_pet --pets 20 --rows 200
+
+Seeds a scratch SQLite database (or --database-url, which must be a throwaway
+database) with 2 x --pets pets, each with --rows medications, billing entries,
+appointments and medical records. Half of the pets are then deleted the way
+delete_pet used to: every child row is loaded and deleted through the session.
+The other half are deleted the way it does now, with one DELETE per table. The
+two strategies alternate on the same data. Both run in one transaction per pet.
+Prints the median and mean time and the SQL statements per pet as JSON. Run from
+the niner-pets directory.
+"""
+import argparse, json, os, random, statistics, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import QueryCounter
+from benchmarks.seed import add_pet_with_history
+
+def orm_cascade(pet_id):
+    """delete_pet before set-based DELETEs: load every row, then delete it."""
+    from models import db, Pet, Medication, Billing, Appointment, Record
+    pet = db.session.get(Pet, pet_id)
+    for model in (Medication, Billing, Appointment, Record):
+        for row in model.query.filter_by(pet_id=pet_id).all():
+            db.session.delete(row)
+    db.session.delete(pet)
+    db.session.commit()
+
+def bulk_delete(pet_id):
+    """delete_pet's current DELETE ... WHERE pet_id = :id per table."""
+    from models import db, Pet, Medication, Billing, Appointment, Record
+    for model in (Medication, Billing, Appointment, Record):
+        model.query.filter_by(pet_id=pet_id).delete(synchronize_session=False)
+    Pet.query.filter_by(id=pet_id).delete(synchronize_session=False)
+    db.session.commit()
+
+STRATEGIES = {'orm_cascade': orm_cascade, 'bulk_delete': bulk_delete}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pets', type=int, default=20, help='pets deleted per strategy')
+    parser.add_argument('--rows', type=int, default=200, help='rows per history table per pet')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--database-url', help='defaults to a scratch SQLite file')
+    args = parser.parse_args()
+
+    scratch = None
+    if not args.database_url:
+        scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        args.database_url = f'sqlite:///{scratch.name}'
+    os.environ['DATABASE_URL'] = args.database_url
+
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from app import create_app
+    from models import db, User, Vet, Pet, Medication, Billing, Appointment, Record
+
+    app = create_app()
+    rng = random.Random(args.seed)
+    results = {name: {'seconds': [], 'statements': []} for name in STRATEGIES}
+    counter = QueryCounter()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(email='bench@uncc.edu', username='bench')
+        user.set_password('bench')
+        vets = [Vet(name=f'Dr. Bench {n}', specialty='general', information='') for n in range(5)]
+        db.session.add_all([user, *vets])
+        db.session.commit()
+        vet_ids = [vet.id for vet in vets]
+
+        pets = {name: [add_pet_with_history(user.id, vet_ids, args.rows, rng) for _ in range(args.pets)]
+                for name in STRATEGIES}
+
+        event.listen(Engine, 'before_cursor_execute', counter)
+        try:
+            for i in range(args.pets):
+                for name, delete in STRATEGIES.items():
+                    db.session.remove()
+                    counter.count = 0
+                    start = time.perf_counter()
+                    delete(pets[name][i])
+                    results[name]['seconds'].append(time.perf_counter() - start)
+                    results[name]['statements'].append(counter.count)
+        finally:
+            event.remove(Engine, 'before_cursor_execute', counter)
+
+        left = sum(model.query.count() for model in (Pet, Medication, Billing, Appointment, Record))
+
+    if scratch:
+        os.unlink(scratch.name)
+
+    report = {
+        'pets_per_strategy': args.pets,
+        'rows_per_pet': args.rows * 4,
+        'database': args.database_url.split(':', 1)[0],
+        'rows_left': left,
+    }
+    for name, result in results.items():
+        report[name] = {
+            'median_ms': round(statistics.median(result['seconds']) * 1000, 2),
+            'mean_ms': round(statistics.mean(result['seconds']) * 1000, 2),
+            'statements_per_pet': statistics.median(result['statements']),
+        }
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
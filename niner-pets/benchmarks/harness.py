@@ -0,0 +1,332 @@
+"""Endpoint benchmark: every route through Flask's test client, at each data scale.
+
+    python -m benchmarks.harness --scales small,medium --output before.json
+    python -m benchmarks.harness --scales small,medium --output after.json
+    python -m benchmarks.harness compare before.json after.json
+
+For each scale a scratch SQLite database is seeded with benchmarks.seed (or
+--database-url is wiped and reseeded; it must be a throwaway database). Each
+route is then called --iterations times for the first seeded user and reported
+with p50/p95/mean latency, SQL statements per request and the peak Python
+memory allocated by one request. The response cache is cleared before every
+timed call unless --warm-cache is given. Run from the niner-pets directory.
+"""
+import argparse, json, os, platform, random, statistics, subprocess, sys, tempfile, time, tracemalloc
+from collections import namedtuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Keep the app's sampled request logs out of the benchmark's output.
+os.environ.setdefault('LOG_SAMPLE_RATE', '0')
+os.environ.setdefault('SLOW_REQUEST_MS', '1e9')
+
+from benchmarks.seed import PASSWORD, SCALES, add_pet_with_history, parse_scale, seed
+
+# `prepare(ctx, i)` runs untimed before iteration i and returns the request's
+# path and test-client keyword arguments (json=, headers=, ...).
+Case = namedtuple('Case', 'name method prepare')
+
+BULK_ROWS = 100
+
+def _new_row(model, **values):
+    from models import db
+    row = model(**values)
+    db.session.add(row)
+    db.session.commit()
+    return row.id
+
+def _history_values(ctx, i):
+    return {'user_id': ctx['user_id'], 'pet_id': ctx['pet_id']}
+
+def cases():
+    from datetime import date, time as clock, timedelta
+    from decimal import Decimal
+    from models import Medication, Billing, Appointment, Record
+
+    def day(i):
+        # Dates after the seeded history, so new appointments never clash.
+        return (date(2030, 1, 1) + timedelta(days=i)).isoformat()
+
+    def medication(ctx, i):
+        return {**_history_values(ctx, i), 'name': 'Carprofen', 'dosage': '25 mg', 'description': 'pain',
+                'start_date': day(i), 'end_date': day(i + 14), 'side_effects': 'none',
+                'instructions': 'with food', 'refill': True}
+
+    def billing(ctx, i):
+        return {**_history_values(ctx, i), 'type': 'exam', 'price': '45.50', 'description': 'checkup',
+                'date': day(i)}
+
+    def record(ctx, i):
+        return {**_history_values(ctx, i), 'vet_id': ctx['vet_id'], 'name': 'Checkup', 'date': day(i),
+                'description': 'annual checkup', 'record_type': 'checkup'}
+
+    def appointment(ctx, i):
+        return {**_history_values(ctx, i), 'vet_id': ctx['vet_id'], 'reason': 'checkup', 'date': day(i),
+                'time': '10:00', 'location': 'Charlotte', 'notes': 'bench'}
+
+    def new_medication(ctx, i):
+        return _new_row(Medication, **{**medication(ctx, i), 'start_date': date(2031, 1, 1),
+                                       'end_date': date(2031, 2, 1)})
+
+    def new_billing(ctx, i):
+        return _new_row(Billing, **{**billing(ctx, i), 'price': Decimal('10.00'), 'date': date(2031, 1, 1)})
+
+    def new_record(ctx, i):
+        return _new_row(Record, **{**record(ctx, i), 'date': date(2031, 1, 1)})
+
+    def new_appointment(ctx, i):
+        return _new_row(Appointment, **{**appointment(ctx, i), 'date': date(2032, 1, 1) + timedelta(days=i),
+                                        'time': clock(10, 0)})
+
+    user = lambda ctx: f"user_id={ctx['user_id']}"
+    auth = lambda ctx: {'headers': {'Authorization': f"Bearer {ctx['token']}"}}
+    get = lambda name, path: Case(name, 'GET', lambda ctx, i: (path(ctx), {}))
+
+    return [
+        get('home', lambda ctx: '/'),
+        Case('login', 'POST', lambda ctx, i: ('/login', {'json': {
+            'email_or_username': ctx['username'], 'password': PASSWORD}})),
+        Case('register', 'POST', lambda ctx, i: ('/register', {'json': {
+            'email': f"new{ctx['run']}-{i}@uncc.edu", 'username': f"new{ctx['run']}-{i}", 'password': 'pw'}})),
+        Case('user', 'GET', lambda ctx, i: ('/user', auth(ctx))),
+        Case('dashboard', 'GET', lambda ctx, i: ('/dashboard', auth(ctx))),
+        get('current_user', lambda ctx: '/current_user'),
+        get('get_username', lambda ctx: '/get_username'),
+        get('vets', lambda ctx: '/vets'),
+        get('vets_availability', lambda ctx: f"/vets/availability?vet_id={ctx['vet_id']}&start=2024-01-01&end=2024-01-31"),
+        Case('add_vet', 'POST', lambda ctx, i: ('/add_vet', {'json': {
+            'name': f'Dr. Bench {i}', 'specialty': 'general', 'information': 'benchmark'}})),
+        get('pets', lambda ctx: f'/pets?{user(ctx)}'),
+        get('get_pet', lambda ctx: f"/pets/{ctx['pet_id']}"),
+        Case('add_pet', 'POST', lambda ctx, i: ('/pets', {'json': {
+            'user_id': ctx['user_id'], 'name': f'Bench {i}', 'species': 'dog', 'breed': 'beagle',
+            'dob': '2020-01-01', 'weight': 12.5}})),
+        Case('update_pet', 'PUT', lambda ctx, i: (f"/pets/{ctx['pet_id']}", {'json': {'weight': 10 + i % 5}})),
+        Case('delete_pet', 'DELETE', lambda ctx, i: (
+            f"/pets/{add_pet_with_history(ctx['user_id'], ctx['vet_ids'], ctx['rows'], random.Random(i))}", {})),
+        get('medications', lambda ctx: f'/medications?{user(ctx)}'),
+        Case('add_medication', 'POST', lambda ctx, i: ('/medications', {'json': medication(ctx, i)})),
+        Case('add_medications_bulk', 'POST', lambda ctx, i: ('/medications/bulk', {'json': [
+            medication(ctx, i * BULK_ROWS + n) for n in range(BULK_ROWS)]})),
+        Case('update_medication', 'PUT', lambda ctx, i: (f"/medications/{ctx['medication_id']}", {
+            'json': medication(ctx, i)})),
+        Case('delete_medication', 'DELETE', lambda ctx, i: (f'/medications/{new_medication(ctx, i)}', {})),
+        get('reminders', lambda ctx: f'/reminders?{user(ctx)}'),
+        get('billing', lambda ctx: f'/billing?{user(ctx)}'),
+        get('billing_summary', lambda ctx: f'/billing/summary?{user(ctx)}&group_by=month'),
+        Case('add_billing', 'POST', lambda ctx, i: ('/billing', {'json': billing(ctx, i)})),
+        Case('add_billing_bulk', 'POST', lambda ctx, i: ('/billing/bulk', {'json': [
+            billing(ctx, i * BULK_ROWS + n) for n in range(BULK_ROWS)]})),
+        Case('update_billing', 'PUT', lambda ctx, i: (f"/billing/{ctx['billing_id']}", {'json': billing(ctx, i)})),
+        Case('delete_billing', 'DELETE', lambda ctx, i: (f'/billing/{new_billing(ctx, i)}', {})),
+        get('appointments', lambda ctx: f'/appointments?{user(ctx)}'),
+        get('appointments_range', lambda ctx: f'/appointments/range?{user(ctx)}&start=2020-01-01&end=2020-12-31'),
+        Case('add_appointment', 'POST', lambda ctx, i: ('/appointments', {'json': appointment(ctx, i)})),
+        Case('update_appointment', 'PUT', lambda ctx, i: (f"/appointments/{ctx['appointment_id']}", {
+            'json': {'notes': f'bench {i}'}})),
+        Case('delete_appointment', 'DELETE', lambda ctx, i: (f'/appointments/{new_appointment(ctx, i)}', {})),
+        get('medicalrecords', lambda ctx: f'/medicalrecords?{user(ctx)}'),
+        Case('add_record', 'POST', lambda ctx, i: ('/medicalrecords', {'json': record(ctx, i)})),
+        Case('add_records_bulk', 'POST', lambda ctx, i: ('/medicalrecords/bulk', {'json': [
+            record(ctx, i * BULK_ROWS + n) for n in range(BULK_ROWS)]})),
+        Case('update_record', 'PUT', lambda ctx, i: (f"/medicalrecords/{ctx['record_id']}", {
+            'json': {'description': f'updated {i}'}})),
+        Case('delete_record', 'DELETE', lambda ctx, i: (f'/medicalrecords/{new_record(ctx, i)}', {})),
+        get('search', lambda ctx: f'/search?{user(ctx)}&q=rabies booster'),
+        get('export_ndjson', lambda ctx: f'/export?{user(ctx)}'),
+        get('export_csv_gzip', lambda ctx: f'/export?{user(ctx)}&format=csv&gzip=1'),
+        get('cache_stats', lambda ctx: '/cache/stats'),
+        get('metrics', lambda ctx: '/metrics'),
+    ]
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))]
+
+def run_case(app, client, case, ctx, iterations, warm_cache, counter):
+    import cache
+    from models import db
+
+    latencies, queries, statuses = [], [], {}
+
+    def call(i):
+        with app.app_context():
+            path, kwargs = case.prepare(ctx, i)
+            db.session.remove()
+        if not warm_cache:
+            cache.backend.clear()
+        counter.count = 0
+        started = time.perf_counter()
+        response = client.open(path, method=case.method, **kwargs)
+        response.get_data()
+        elapsed = time.perf_counter() - started
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        return elapsed, counter.count
+
+    call(-1)  # warm-up
+    statuses.clear()
+    for i in range(iterations):
+        elapsed, count = call(i)
+        latencies.append(elapsed * 1000)
+        queries.append(count)
+    counted = dict(statuses)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    call(iterations)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'p50_ms': round(percentile(latencies, 0.5), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'queries': round(statistics.fmean(queries), 2),
+        'peak_kib': round(peak / 1024, 1),
+        'statuses': {str(code): n for code, n in sorted(counted.items())},
+    }
+
+def run_scale(name, volumes, args, run_id):
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from app import create_app
+    from config import CONFIGS, engine_options
+    from models import db, User, Medication, Billing, Appointment, Record
+
+    scratch = None
+    database_url = args.database_url
+    if not database_url:
+        scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        database_url = f'sqlite:///{scratch.name}'
+    config = type('BenchmarkConfig', (CONFIGS['production'],), {
+        'SQLALCHEMY_DATABASE_URI': database_url,
+        'SQLALCHEMY_ENGINE_OPTIONS': engine_options(database_url),
+        # One process, so the in-process cache is safe without Redis.
+        'LOCAL_RESPONSE_CACHE': True,
+    })
+    app = create_app(config)
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        started = time.perf_counter()
+        seeded = seed(*volumes)
+        seed_seconds = time.perf_counter() - started
+        ctx = {
+            **seeded, 'run': run_id, 'rows': volumes[2],
+            'username': db.session.get(User, seeded['user_id']).username,
+        }
+        for key, model in (('medication_id', Medication), ('billing_id', Billing),
+                           ('appointment_id', Appointment), ('record_id', Record)):
+            ctx[key] = db.session.query(model.id).filter(model.pet_id == ctx['pet_id']).order_by(model.id).first()[0]
+        db.session.remove()
+
+    client = app.test_client()
+    login = client.post('/login', json={'email_or_username': ctx['username'], 'password': PASSWORD})
+    ctx['token'] = login.get_json()['token']
+
+    counter = QueryCounter()
+    event.listen(Engine, 'before_cursor_execute', counter)
+    try:
+        selected = [case for case in cases() if not args.routes or case.name in args.routes]
+        routes = {}
+        for case in selected:
+            routes[case.name] = run_case(app, client, case, ctx, args.iterations, args.warm_cache, counter)
+            print(f'  {name:8} {case.name:24} p50 {routes[case.name]["p50_ms"]:9.3f} ms', file=sys.stderr)
+    finally:
+        event.remove(Engine, 'before_cursor_execute', counter)
+        with app.app_context():
+            db.engine.dispose()
+        if scratch:
+            os.unlink(scratch.name)
+
+    users, pets, rows = volumes
+    return {
+        'volumes': {'users': users, 'pets_per_user': pets, 'rows_per_pet': rows,
+                    'rows_per_user': pets * rows * 4},
+        'seed_seconds': round(seed_seconds, 2),
+        'routes': routes,
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def benchmark(args):
+    # The app module reads DATABASE_URL at import; each scale then gets its
+    # own app and database through a config subclass.
+    os.environ.setdefault('DATABASE_URL', args.database_url or 'sqlite://')
+    run_id = int(time.time())
+    result = {
+        'meta': {
+            'commit': git_commit(), 'python': platform.python_version(),
+            'database': (args.database_url or 'sqlite').split(':', 1)[0],
+            'iterations': args.iterations, 'warm_cache': args.warm_cache,
+        },
+        'scales': {},
+    }
+    for name in args.scales.split(','):
+        result['scales'][name] = run_scale(name, parse_scale(name), args, run_id)
+
+    output = json.dumps(result, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+def compare(args):
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    print(f"{'scale':8} {'route':24} {'p50 before':>11} {'p50 after':>10} {'ratio':>6} {'queries':>12}")
+    regressions = 0
+    for scale, scale_after in after['scales'].items():
+        routes_before = before['scales'].get(scale, {}).get('routes', {})
+        for route, stats in scale_after['routes'].items():
+            old = routes_before.get(route)
+            if old is None:
+                continue
+            ratio = stats['p50_ms'] / old['p50_ms'] if old['p50_ms'] else float('inf')
+            flag = ''
+            if ratio > args.threshold or stats['queries'] > old['queries']:
+                flag = '  <-- slower' if ratio > args.threshold else '  <-- more queries'
+                regressions += 1
+            print(f"{scale:8} {route:24} {old['p50_ms']:11.3f} {stats['p50_ms']:10.3f} {ratio:6.2f} "
+                  f"{old['queries']:5g} -> {stats['queries']:<4g}{flag}")
+    return 1 if regressions and args.fail else 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command')
+    parser.add_argument('--scales', default='small,medium',
+                        help=f'comma-separated: {", ".join(SCALES)} or USERSxPETSxROWS')
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--routes', type=lambda value: value.split(','), help='only these case names')
+    parser.add_argument('--warm-cache', action='store_true', help="don't clear the response cache between calls")
+    parser.add_argument('--database-url', help='a throwaway database; it is dropped and reseeded per scale')
+    parser.add_argument('--output', help='write the JSON here instead of stdout')
+
+    compare_parser = subparsers.add_parser('compare', help='compare two result files')
+    compare_parser.add_argument('before')
+    compare_parser.add_argument('after')
+    compare_parser.add_argument('--threshold', type=float, default=1.2, help='p50 ratio that counts as slower')
+    compare_parser.add_argument('--fail', action='store_true', help='exit 1 on any regression')
+
+    args = parser.parse_args()
+    if args.command == 'compare':
+        sys.exit(compare(args))
+    benchmark(args)
+
+if __name__ == '__main__':
+    main()
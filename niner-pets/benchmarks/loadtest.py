@@ -0,0 +1,156 @@
+"""Closed-loop HTTP load test against a running NinerPets server.
+
+    python benchmarks/loadtest.py --url http://localhost:5000 --user-id 1 \
+        --concurrency 16 --duration 20
+
+Run it once per gunicorn preset (GUNICORN_PRESET=small|medium|large) to
+compare throughput; results are printed as JSON.
+
+--login USERNAME:PASSWORD posts to /login instead and reports successful
+logins/sec and how many attempts the password hash pool turned away with 503.
+With --pool-sizes 1,2,4,8 and --database-url, a local server is started on
+that database once per PASSWORD_HASH_WORKERS value instead of using --url,
+and one result is printed per pool size:
+
+    python -m benchmarks.seed --scale small --database-url sqlite:///bench.db --reset
+    python benchmarks/loadtest.py --login bench1:benchmark --pool-sizes 1,2,4,8 \
+        --database-url sqlite:///bench.db --concurrency 32
+"""
+import argparse, json, os, socket, statistics, subprocess, sys, threading, time
+from collections import Counter
+from urllib.request import Request, urlopen
+from urllib.error import HTTPError
+
+DEFAULT_PATHS = ['/vets', '/pets', '/medications', '/billing', '/medicalrecords', '/appointments']
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def fetch(request):
+    """The response status, or None when the connection failed."""
+    try:
+        with urlopen(request, timeout=30) as response:
+            response.read()
+            return response.status
+    except HTTPError as e:
+        return e.code
+    except OSError:
+        return None
+
+def list_requests(base_url, paths, user_id):
+    def send(i):
+        return fetch(Request(f'{base_url}{paths[i % len(paths)]}?user_id={user_id}'))
+    return send
+
+def login_requests(base_url, username, password):
+    body = json.dumps({'email_or_username': username, 'password': password}).encode()
+    def send(i):
+        return fetch(Request(f'{base_url}/login', data=body, headers={'Content-Type': 'application/json'}))
+    return send
+
+def worker(send, deadline, latencies, statuses, lock):
+    i = 0
+    local_latencies, local_statuses = [], Counter()
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        local_statuses[send(i)] += 1
+        i += 1
+        local_latencies.append(time.perf_counter() - start)
+    with lock:
+        latencies.extend(local_latencies)
+        statuses.update(local_statuses)
+
+def run(send, concurrency, duration):
+    latencies, statuses, lock = [], Counter(), threading.Lock()
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=worker, args=(send, deadline, latencies, statuses, lock))
+        for _ in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': sum(n for status, n in statuses.items() if status is None or status >= 500),
+        'requests_per_sec': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2) if latencies else None,
+        'statuses': {str(status): n for status, n in sorted(statuses.items(), key=lambda item: str(item[0]))},
+        'seconds': round(elapsed, 2),
+    }
+
+def login_result(result):
+    statuses = result['statuses']
+    result['logins_per_sec'] = round(statuses.get('200', 0) / result['seconds'], 1)
+    result['busy_503'] = statuses.get('503', 0)
+    return result
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_server(database_url, pool_size):
+    """A threaded local server with PASSWORD_HASH_WORKERS=pool_size; returns
+    the process and its base URL once it answers."""
+    port = _free_port()
+    env = {**os.environ, 'DATABASE_URL': database_url, 'FLASK_CONFIG': 'production',
+           'PASSWORD_HASH_WORKERS': str(pool_size), 'LOG_SAMPLE_RATE': '0'}
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'flask', '--app', 'wsgi', 'run', '--port', str(port), '--with-threads'],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.perf_counter() + 30
+    while fetch(Request(f'{base_url}/')) != 200:
+        if server.poll() is not None or time.perf_counter() > deadline:
+            server.kill()
+            raise SystemExit(f'server for pool size {pool_size} did not start')
+        time.sleep(0.2)
+    return server, base_url
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--user-id', type=int, default=1)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--paths', default=','.join(DEFAULT_PATHS))
+    parser.add_argument('--label', default='', help='e.g. the gunicorn preset under test')
+    parser.add_argument('--login', metavar='USERNAME:PASSWORD', help='load POST /login instead of the list paths')
+    parser.add_argument('--pool-sizes', help='with --login: start a local server per PASSWORD_HASH_WORKERS value')
+    parser.add_argument('--database-url', help='database for the --pool-sizes servers')
+    args = parser.parse_args()
+
+    if not args.login:
+        result = run(list_requests(args.url.rstrip('/'), args.paths.split(','), args.user_id),
+                     args.concurrency, args.duration)
+        print(json.dumps({'label': args.label, **result}, indent=2))
+        return
+
+    username, _, password = args.login.partition(':')
+    if not args.pool_sizes:
+        result = run(login_requests(args.url.rstrip('/'), username, password), args.concurrency, args.duration)
+        print(json.dumps({'label': args.label, **login_result(result)}, indent=2))
+        return
+
+    if not args.database_url:
+        parser.error('--pool-sizes needs --database-url')
+    results = []
+    for pool_size in [int(size) for size in args.pool_sizes.split(',')]:
+        server, base_url = start_server(args.database_url, pool_size)
+        try:
+            result = run(login_requests(base_url, username, password), args.concurrency, args.duration)
+        finally:
+            server.terminate()
+            server.wait()
+        results.append({'label': args.label, 'pool_size': pool_size, **login_result(result)})
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""Fill the NinerPets schema with synthetic data.
+
+    python -m benchmarks.seed --scale medium --database-url sqlite:///bench.db --reset
+    python -m benchmarks.seed --scale 20x3x500      # users x pets per user x rows per pet
+
+Every pet gets `rows` medications, billing entries, appointments and medical
+records. Run from the niner-pets directory. Without --database-url the app's
+DATABASE_URL is used; --reset drops and recreates all tables first.
+"""
+import argparse, json, os, random, sys, time
+from datetime import date, time as clock, timedelta
+from decimal import Decimal
+
+# users, pets per user, rows per pet (per history table)
+SCALES = {
+    'small': (10, 2, 20),
+    'medium': (50, 3, 100),
+    'large': (200, 3, 400),
+}
+VETS = 20
+PASSWORD = 'benchmark'
+CHUNK_SIZE = 5000
+
+SPECIES = [('dog', 'labrador'), ('dog', 'beagle'), ('cat', 'siamese'), ('cat', 'tabby'), ('rabbit', 'lop')]
+MEDICATIONS = ['Carprofen', 'Apoquel', 'Heartgard', 'Bravecto', 'Amoxicillin', 'Gabapentin']
+BILLING_TYPES = ['exam', 'vaccine', 'surgery', 'grooming', 'pharmacy', 'lab work']
+RECORD_TYPES = ['vaccination', 'checkup', 'surgery', 'lab result', 'dental']
+WORDS = ('rabies booster annual exam dental cleaning bloodwork allergy itching limp '
+         'vomiting weight check follow up xray stitches deworming flea tick').split()
+
+def parse_scale(value):
+    """A scale name or 'USERSxPETSxROWS'."""
+    if value in SCALES:
+        return SCALES[value]
+    try:
+        users, pets, rows = (int(part) for part in value.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'unknown scale {value!r}; use one of {", ".join(SCALES)} or UxPxR')
+    return users, pets, rows
+
+def _text(rng, words=6):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+def _insert(model, rows):
+    from models import db
+    from sqlalchemy import insert
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.session.execute(insert(model), rows[start:start + CHUNK_SIZE])
+
+def pet_history(rng, user_id, pet_id, vet_ids, rows):
+    """Column values for `rows` entries of each history table for one pet."""
+    start = date(2015, 1, 1)
+    history = {'medications': [], 'billing': [], 'appointments': [], 'records': []}
+    for _ in range(rows):
+        day = start + timedelta(days=rng.randrange(4000))
+        vet_id = rng.choice(vet_ids)
+        history['medications'].append({
+            'pet_id': pet_id, 'user_id': user_id, 'name': rng.choice(MEDICATIONS),
+            'dosage': f'{rng.randrange(1, 500)} mg', 'description': _text(rng),
+            'start_date': day, 'end_date': day + timedelta(days=rng.randrange(7, 120)),
+            'side_effects': _text(rng, 3), 'instructions': _text(rng, 4), 'refill': rng.random() < 0.3,
+        })
+        history['billing'].append({
+            'user_id': user_id, 'pet_id': pet_id, 'type': rng.choice(BILLING_TYPES),
+            'price': Decimal(rng.randrange(500, 150000)).scaleb(-2), 'description': _text(rng, 4),
+            'date': day,
+        })
+        history['appointments'].append({
+            'user_id': user_id, 'pet_id': pet_id, 'vet_id': vet_id, 'reason': _text(rng, 3),
+            'date': day, 'time': clock(9 + rng.randrange(8), rng.choice((0, 30))),
+            'location': 'Charlotte', 'notes': _text(rng, 5),
+        })
+        history['records'].append({
+            'user_id': user_id, 'pet_id': pet_id, 'vet_id': vet_id,
+            'name': f'{rng.choice(RECORD_TYPES).title()} visit', 'date': day,
+            'description': _text(rng, 10), 'record_type': rng.choice(RECORD_TYPES),
+        })
+    return history
+
+def add_pet_with_history(user_id, vet_ids, rows, rng=None):
+    """Insert one pet and its history; returns the pet id. Used by the harness
+    to give each delete_pet iteration its own pet."""
+    from models import db, Pet, Medication, Billing, Appointment, Record
+    rng = rng or random.Random()
+    kind, breed = rng.choice(SPECIES)
+    pet = Pet(user_id=user_id, name=f'Pet {rng.randrange(10**6)}', species=kind, breed=breed,
+              dob=date(2012, 1, 1) + timedelta(days=rng.randrange(3000)),
+              weight=Decimal(rng.randrange(100, 9000)).scaleb(-2))
+    db.session.add(pet)
+    db.session.flush()
+    history = pet_history(rng, user_id, pet.id, vet_ids, rows)
+    for model, key in ((Medication, 'medications'), (Billing, 'billing'),
+                       (Appointment, 'appointments'), (Record, 'records')):
+        _insert(model, history[key])
+    db.session.commit()
+    return pet.id
+
+def seed(users, pets, rows, vets=VETS, rng_seed=1):
+    """Insert synthetic data in the current app context.
+
+    Returns the row counts plus the ids the harness needs: the first user,
+    one of their pets, and a vet.
+    """
+    from flask import current_app
+    from models import db, User, Vet, Pet, Medication, Billing, Appointment, Record
+    from passwords import hash_password
+    import reports
+
+    rng = random.Random(rng_seed)
+    # One hash shared by every user; hashing each would dominate the run.
+    password_hash = hash_password(PASSWORD)
+
+    _insert(Vet, [
+        {'name': f'Dr. {rng.choice(WORDS).title()} {n}', 'specialty': rng.choice(RECORD_TYPES),
+         'information': _text(rng, 8)}
+        for n in range(vets)
+    ])
+    vet_ids = [row.id for row in db.session.query(Vet.id).order_by(Vet.id)]
+
+    first = db.session.query(db.func.coalesce(db.func.max(User.id), 0)).scalar() + 1
+    _insert(User, [
+        {'email': f'bench{first + n}@uncc.edu', 'username': f'bench{first + n}',
+         'password': password_hash}
+        for n in range(users)
+    ])
+    user_ids = [row.id for row in db.session.query(User.id).filter(User.id >= first).order_by(User.id)]
+
+    pet_rows = []
+    for user_id in user_ids:
+        for _ in range(pets):
+            kind, breed = rng.choice(SPECIES)
+            pet_rows.append({
+                'user_id': user_id, 'name': rng.choice(WORDS).title(), 'species': kind, 'breed': breed,
+                'dob': date(2012, 1, 1) + timedelta(days=rng.randrange(3000)),
+                'weight': Decimal(rng.randrange(100, 9000)).scaleb(-2),
+            })
+    _insert(Pet, pet_rows)
+    pet_ids = db.session.query(Pet.id, Pet.user_id).filter(Pet.user_id >= first).order_by(Pet.id).all()
+
+    counts = {'medications': 0, 'billing': 0, 'appointments': 0, 'records': 0}
+    for pet_id, user_id in pet_ids:
+        history = pet_history(rng, user_id, pet_id, vet_ids, rows)
+        for model, key in ((Medication, 'medications'), (Billing, 'billing'),
+                           (Appointment, 'appointments'), (Record, 'records')):
+            _insert(model, history[key])
+            counts[key] += len(history[key])
+    db.session.commit()
+
+    if current_app.config.get('BILLING_ROLLUP'):
+        reports.rebuild_rollup()
+
+    return {
+        'users': len(user_ids), 'vets': len(vet_ids), 'pets': len(pet_ids), **counts,
+        'user_id': user_ids[0],
+        'pet_id': next(pet_id for pet_id, user_id in pet_ids if user_id == user_ids[0]),
+        'vet_id': vet_ids[0],
+        'vet_ids': vet_ids,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=parse_scale, default=SCALES['small'],
+                        help=f'{", ".join(SCALES)} or USERSxPETSxROWS (default small)')
+    parser.add_argument('--vets', type=int, default=VETS)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--database-url')
+    parser.add_argument('--reset', action='store_true', help='drop and recreate all tables first')
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app import create_app
+    from models import db
+
+    app = create_app()
+    with app.app_context():
+        if args.reset:
+            db.drop_all()
+        db.create_all()
+        started = time.perf_counter()
+        result = seed(*args.scale, vets=args.vets, rng_seed=args.seed)
+        result['seconds'] = round(time.perf_counter() - started, 2)
+    result.pop('vet_ids')
+    print(json.dumps(result, indent=2))
+
+if __name__ == '__main__':
+    main()
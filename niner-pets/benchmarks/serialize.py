@@ -0,0 +1,139 @@
+"""List serialization: msgspec Structs from Rows versus to_dict() and jsonify.
+
+    python -m benchmarks.serialize --rows 10000
+
+Seeds a scratch SQLite database (or --database-url, which must be a throwaway
+database) with one pet that has --rows medications and billing entries. Each
+list is then built two ways. The first is how the list routes used to do it:
+ORM instances with their pet joined in, to_dict() per row, then jsonify. The
+second is how they do it now: the column-projected query, a Struct per Row, and
+msgspec. Both are timed with and without the query, and one full pass of each
+runs under tracemalloc for the peak memory it allocates.
+
+A third case isolates the fetch step: the same ORM entity load against the
+projected select, both followed by the same Struct building and msgspec
+encoder, with the ORM entities read back into the projected row's shape.
+Results are printed as JSON. Run from the niner-pets directory.
+"""
+import argparse, json, os, statistics, sys, tempfile, time, tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.seed import seed
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return result, statistics.median(times)
+
+def peak_allocated(fn):
+    """Peak bytes allocated by Python while fn runs."""
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+def as_rows(instances, columns):
+    """ORM instances as the tuples the projected query returns for `columns`."""
+    names = [column.key for column in columns]
+    return [tuple(instance.pet.name if name == 'pet_name' else getattr(instance, name) for name in names)
+            for instance in instances]
+
+def lists(user_id, limit):
+    """{list: (fetch_orm, dump_orm, fetch_rows, dump_rows, columns)} for each benchmarked list."""
+    from flask import jsonify
+    from sqlalchemy.orm import joinedload
+    from models import Medication, Billing
+    import queries, schemas
+
+    def orm(model):
+        return lambda: (model.query.options(joinedload(model.pet))
+                        .filter(model.user_id == user_id).order_by(model.id).limit(limit).all())
+
+    def rows(list_query):
+        return lambda: queries.read(list_query.base.order_by(list_query.id_column).limit(limit))
+
+    def to_dict_json(instances):
+        return jsonify([{**instance.to_dict(), 'pet_name': instance.pet.name} for instance in instances]).get_data()
+
+    return {
+        'medications': (orm(Medication), to_dict_json, rows(queries.medications_list(user_id)),
+                        lambda result: schemas.encoder.encode(schemas.medications_out(result)),
+                        queries.MEDICATION_COLUMNS),
+        'billing': (orm(Billing), to_dict_json, rows(queries.billing_list(user_id)),
+                    lambda result: schemas.encoder.encode(schemas.billing_out(result)),
+                    queries.BILLING_COLUMNS),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--database-url', help='defaults to a scratch SQLite file')
+    args = parser.parse_args()
+
+    scratch = None
+    if not args.database_url:
+        scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        args.database_url = f'sqlite:///{scratch.name}'
+    os.environ['DATABASE_URL'] = args.database_url
+
+    from app import create_app
+    from models import db
+
+    app = create_app()
+    report = {'rows': args.rows, 'database': args.database_url.split(':', 1)[0]}
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        user_id = seed(1, 1, args.rows, vets=1)['user_id']
+
+        for name, (fetch_orm, dump_orm, fetch_rows, dump_rows, columns) in lists(user_id, args.rows).items():
+            results = {}
+            for label, fetch, dump in (('to_dict_jsonify', fetch_orm, dump_orm),
+                                       ('msgspec_structs', fetch_rows, dump_rows)):
+                db.session.remove()
+                fetched = fetch()
+                body, serialize_seconds = timed(lambda: dump(fetched), args.repeat)
+
+                def full():
+                    db.session.expunge_all()
+                    return dump(fetch())
+                _, total_seconds = timed(full, args.repeat)
+                peak = peak_allocated(full)
+                results[label] = {
+                    'serialize_ms': round(serialize_seconds * 1000, 2),
+                    'query_and_serialize_ms': round(total_seconds * 1000, 2),
+                    'peak_allocated_kib': round(peak / 1024, 1),
+                    'bytes': len(body),
+                }
+
+            fetch_only = {}
+            for label, fetch, encode in (('orm_entities', fetch_orm, lambda result: dump_rows(as_rows(result, columns))),
+                                         ('projected_rows', fetch_rows, dump_rows)):
+                def fetch_fresh():
+                    db.session.expunge_all()
+                    return fetch()
+                _, fetch_seconds = timed(fetch_fresh, args.repeat)
+                body, total_seconds = timed(lambda: encode(fetch_fresh()), args.repeat)
+                fetch_only[label] = {
+                    'fetch_ms': round(fetch_seconds * 1000, 2),
+                    'fetch_and_encode_ms': round(total_seconds * 1000, 2),
+                    'bytes': len(body),
+                }
+            results['fetch_only'] = fetch_only
+            report[name] = results
+
+    if scratch:
+        os.unlink(scratch.name)
+
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+import csv, io, json
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from models import db, Vet, Pet
+from validation import ValidationError
+
+# Bulk import for the per-user history tables. Rows arrive as a JSON array,
+# NDJSON or CSV, go through the same validator as the single-row routes and
+# are inserted with one executemany per chunk, each chunk in its own
+# transaction. A chunk the database rejects is retried row by row.
+
+CHUNK_SIZE = 1000
+
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+CSV_MIMETYPES = ('text/csv', 'application/csv')
+
+def _ndjson_rows(stream):
+    row_number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            data = json.loads(line)
+        except ValueError:
+            yield row_number, None, 'Invalid JSON.'
+            continue
+        if isinstance(data, dict):
+            yield row_number, data, None
+        else:
+            yield row_number, None, 'Each line must be a JSON object.'
+
+def _csv_rows(stream):
+    for row_number, data in enumerate(csv.DictReader(stream), start=1):
+        # An empty CSV cell means the same as a missing JSON key.
+        yield row_number, {k: (v if v != '' else None) for k, v in data.items()}, None
+
+def _json_rows(rows):
+    for row_number, data in enumerate(rows, start=1):
+        if isinstance(data, dict):
+            yield row_number, data, None
+        else:
+            yield row_number, None, 'Each row must be a JSON object.'
+
+def read_rows(req):
+    """Return an iterator of (row_number, data, error) over the request body.
+
+    NDJSON and CSV bodies are read from the request stream line by line.
+    """
+    if req.mimetype in NDJSON_MIMETYPES:
+        return _ndjson_rows(io.TextIOWrapper(req.stream, encoding='utf-8'))
+    if req.mimetype in CSV_MIMETYPES:
+        return _csv_rows(io.TextIOWrapper(req.stream, encoding='utf-8', newline=''))
+
+    rows = req.get_json(silent=True)
+    if not isinstance(rows, list):
+        raise ValidationError('Request body must be a JSON array, NDJSON or CSV.')
+    return _json_rows(rows)
+
+def _existing_ids(model, ids):
+    if not ids:
+        return set()
+    return {row.id for row in db.session.query(model.id).filter(model.id.in_(ids))}
+
+def _insert_chunk(model, chunk, errors, user_ids, after_insert):
+    # Check the foreign keys up front: a violation inside the executemany would
+    # otherwise reject every row in the chunk.
+    pet_ids = _existing_ids(Pet, {values['pet_id'] for _, values in chunk})
+    vet_ids = set()
+    if hasattr(model, 'vet_id'):
+        vet_ids = _existing_ids(Vet, {values['vet_id'] for _, values in chunk})
+
+    rows = []
+    for row_number, values in chunk:
+        if values['pet_id'] not in pet_ids:
+            errors.append({'row': row_number, 'error': 'Pet not found.'})
+        elif 'vet_id' in values and values['vet_id'] not in vet_ids:
+            errors.append({'row': row_number, 'error': 'Vet not found.'})
+        else:
+            rows.append((row_number, values))
+
+    if not rows:
+        return 0
+    try:
+        _insert_values(model, [values for _, values in rows], after_insert)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        rows = _insert_one_by_one(model, rows, errors, after_insert)
+        db.session.commit()
+    user_ids.update(values['user_id'] for _, values in rows)
+    return len(rows)
+
+def _insert_values(model, values, after_insert):
+    db.session.execute(insert(model), values)
+    if after_insert:
+        after_insert(values)
+
+def _insert_one_by_one(model, rows, errors, after_insert):
+    # The chunk broke a constraint the checks above don't cover. Retry its rows
+    # one at a time, each in a savepoint, so only the offending rows are
+    # rejected; returns the rows that went in.
+    inserted = []
+    for row_number, values in rows:
+        try:
+            with db.session.begin_nested():
+                _insert_values(model, [values], after_insert)
+        except IntegrityError as e:
+            errors.append({'row': row_number, 'error': f'Rejected by the database: {e.orig}'})
+        else:
+            inserted.append((row_number, values))
+    return inserted
+
+def import_rows(model, rows, validate, defaults=None, after_insert=None):
+    """Insert validated rows chunk by chunk; `after_insert` is called with each
+    chunk's values inside its transaction."""
+    inserted = 0
+    errors = []
+    user_ids = set()
+    chunk = []
+    for row_number, data, error in rows:
+        if error is None:
+            try:
+                values = validate(data)
+            except ValidationError as e:
+                error = e.message
+        if error is not None:
+            errors.append({'row': row_number, 'error': error})
+            continue
+
+        if defaults:
+            values = {**{k: factory() for k, factory in defaults.items()}, **values}
+        chunk.append((row_number, values))
+        if len(chunk) >= CHUNK_SIZE:
+            inserted += _insert_chunk(model, chunk, errors, user_ids, after_insert)
+            chunk = []
+
+    if chunk:
+        inserted += _insert_chunk(model, chunk, errors, user_ids, after_insert)
+
+    errors.sort(key=lambda e: e['row'])
+    return inserted, errors, user_ids
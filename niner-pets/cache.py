@@ -0,0 +1,151 @@
+import time, zlib
+from datetime import datetime, timezone
+from functools import wraps
+from urllib.parse import urlencode
+from cachelib import SimpleCache, RedisCache
+from flask import current_app, request, make_response
+from config import REDIS_URL, CACHE_DEFAULT_TTL, CACHE_VETS_TTL
+
+# Response cache for read endpoints. Redis is used when REDIS_URL is set;
+# otherwise an in-process SimpleCache. Each worker process would have its own
+# SimpleCache, and a write invalidates only the copy in the worker that served
+# it, so the in-process cache is only used when LOCAL_RESPONSE_CACHE says the
+# app runs as a single process (development, tests, benchmarks).
+#
+# Invalidation is generation based: every cache key embeds a per-scope
+# generation number (one scope per user, plus one for the vet directory), and
+# a write bumps that number so all of the scope's cached pages are skipped at
+# once and expire on their own. The generation is the time of the scope's last
+# write in microseconds, so it doubles as the version behind ETag and
+# Last-Modified on conditional GETs.
+
+DEFAULT_TTL = CACHE_DEFAULT_TTL
+VETS_TTL = CACHE_VETS_TTL
+
+def _make_backend():
+    if REDIS_URL:
+        import redis
+        return RedisCache(host=redis.from_url(REDIS_URL), default_timeout=DEFAULT_TTL,
+                          key_prefix='ninerpets:')
+    return SimpleCache(default_timeout=DEFAULT_TTL)
+
+backend = _make_backend()
+shared = isinstance(backend, RedisCache)
+stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'not_modified': 0}
+
+def enabled():
+    """Whether cached responses and generations can be trusted by this app:
+    the backend is shared by every worker, or there is only one process."""
+    return shared or current_app.config['LOCAL_RESPONSE_CACHE']
+
+def _now_us():
+    return time.time_ns() // 1000
+
+def _generation(scope):
+    generation = backend.get(f'gen:{scope}')
+    if generation is None:
+        # Generation keys never expire; letting one lapse could revive pages
+        # cached under an older number.
+        generation = _now_us()
+        backend.add(f'gen:{scope}', generation, timeout=0)
+    return generation
+
+def generations(scopes):
+    """{scope: generation} for several scopes, read in one round trip."""
+    scopes = list(scopes)
+    found = backend.get_many(*(f'gen:{scope}' for scope in scopes))
+    return {scope: _generation(scope) if generation is None else generation
+            for scope, generation in zip(scopes, found)}
+
+def last_write(*scopes):
+    """The latest generation (last write, in microseconds) among the scopes,
+    or None when none of them has one."""
+    found = backend.get_many(*(f'gen:{scope}' for scope in scopes))
+    return max((generation for generation in found if generation is not None), default=None)
+
+def invalidate(scope):
+    stats['invalidations'] += 1
+    generation = max(_generation(scope) + 1, _now_us())
+    backend.set(f'gen:{scope}', generation, timeout=0)
+
+def invalidate_user(user_id):
+    invalidate(f'user:{user_id}')
+
+def invalidate_vets():
+    invalidate('vets')
+
+def _user_scope():
+    try:
+        return f"user:{int(request.args.get('user_id'))}"
+    except (TypeError, ValueError):
+        return None
+
+def cached_response(namespace, scope=_user_scope, ttl=None):
+    """Cache a GET view's 200 responses, keyed by scope and query string.
+
+    `scope` is a callable returning the invalidation scope for the current
+    request (the requesting user by default); returning None skips the cache,
+    as does a cache that isn't enabled().
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            scope_key = scope() if callable(scope) else scope
+            if scope_key is None or not enabled():
+                return view(*args, **kwargs)
+
+            query = urlencode(sorted(request.args.items(multi=True)))
+            key = f'{namespace}:{scope_key}:{_generation(scope_key)}:{query}'
+            hit = backend.get(key)
+            if hit is not None:
+                stats['hits'] += 1
+                body, headers = hit
+                response = make_response(body, 200)
+                response.headers.update(headers)
+                response.mimetype = 'application/json'
+                return response
+
+            stats['misses'] += 1
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                headers = {k: v for k, v in response.headers.items() if k.startswith('X-')}
+                backend.set(key, (response.get_data(), headers), timeout=ttl)
+            return response
+        return wrapper
+    return decorator
+
+def conditional_response(namespace, scope=_user_scope):
+    """Answer If-None-Match from the scope's generation alone.
+
+    A matching request gets a 304 without the view running, so no rows are
+    queried or serialized. Other responses carry ETag and Last-Modified.
+    Generations kept per worker process can't vouch for another worker's
+    writes, so unless the cache is enabled() no validators are sent and
+    If-None-Match is ignored.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            scope_key = scope() if callable(scope) else scope
+            if scope_key is None or not enabled():
+                return view(*args, **kwargs)
+
+            generation = _generation(scope_key)
+            query = urlencode(sorted(request.args.items(multi=True)))
+            etag = f'{namespace}-{generation}-{zlib.crc32(query.encode()):08x}'
+            last_modified = datetime.fromtimestamp(generation / 1e6, tz=timezone.utc)
+
+            if request.if_none_match.contains_weak(etag):
+                stats['not_modified'] += 1
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            response.last_modified = last_modified
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
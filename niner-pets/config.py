@@ -0,0 +1,137 @@
+import os
+from datetime import timedelta
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# App configuration, read from the environment / .env file. create_app() takes
+# one of the classes below (or its name: 'development', 'production').
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+def engine_options(database_url):
+    """SQLAlchemy engine options for the connection pool.
+
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE (seconds),
+    DB_POOL_PRE_PING and DB_STATEMENT_TIMEOUT_MS (Postgres only) tune the pool.
+    """
+    options = {
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+    }
+    if database_url and database_url.startswith('sqlite'):
+        # SQLite uses its own pool classes, which take no size settings.
+        return options
+
+    options.update({
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+    })
+    statement_timeout = os.getenv('DB_STATEMENT_TIMEOUT_MS')
+    if statement_timeout and database_url and database_url.startswith('postgres'):
+        options['connect_args'] = {'options': f'-c statement_timeout={int(statement_timeout)}'}
+    return options
+
+REPLICA_BIND_PREFIX = 'replica'
+
+def replica_binds(urls, options=engine_options):
+    """SQLALCHEMY_BINDS entries (replica0, replica1, ...) for read replica URLs."""
+    return {f'{REPLICA_BIND_PREFIX}{index}': {'url': url, **options(url)} for index, url in enumerate(urls)}
+
+# The response cache is built when cache.py is imported, which can happen
+# before create_app() sees a config class, so its settings are read here, once
+# the .env file above has been loaded.
+REDIS_URL = os.getenv('REDIS_URL')
+CACHE_DEFAULT_TTL = int(os.getenv('CACHE_DEFAULT_TTL', 300))
+CACHE_VETS_TTL = int(os.getenv('CACHE_VETS_TTL', 3600))
+
+def async_database_url(database_url):
+    """The same database through an async driver (asyncpg / aiosqlite)."""
+    for prefix, async_prefix in (('postgresql://', 'postgresql+asyncpg://'),
+                                 ('postgres://', 'postgresql+asyncpg://'),
+                                 ('postgresql+psycopg2://', 'postgresql+asyncpg://'),
+                                 ('sqlite://', 'sqlite+aiosqlite://')):
+        if database_url.startswith(prefix):
+            return async_prefix + database_url[len(prefix):]
+    return database_url
+
+def async_engine_options(database_url):
+    options = engine_options(database_url)
+    connect_args = options.pop('connect_args', None)
+    if connect_args:
+        # asyncpg takes server settings directly instead of a libpq options string.
+        timeout = connect_args['options'].split('=', 1)[1]
+        options['connect_args'] = {'server_settings': {'statement_timeout': timeout}}
+    return options
+
+class Config:
+    DEBUG = False
+    JWT_SECRET_KEY = os.getenv('SECRET_KEY', 'supersecretkey')
+    JWT_TOKEN_LOCATION = ['headers']
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=2)
+
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+
+    # Read replicas for the read-only GET routes, comma separated; a user's
+    # reads stay on the primary for REPLICA_STICKY_SECONDS after their own
+    # write. See replicas.py.
+    DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    SQLALCHEMY_BINDS = replica_binds(DATABASE_REPLICA_URLS)
+    REPLICA_STICKY_SECONDS = float(os.getenv('REPLICA_STICKY_SECONDS', 5))
+
+    # Password hashing cost and the bounded pool logins verify on; see
+    # passwords.py. Stored hashes under another method are upgraded on login.
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', PASSWORD_HASH_WORKERS * 4))
+
+    SESSION_COOKIE_SAMESITE = 'None'  # For cross-origin session cookies
+    SESSION_COOKIE_SECURE = False  # Set to True if using HTTPS, False otherwise (especially on localhost)
+
+    CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:3000').split(',')
+
+    # Without REDIS_URL the response cache lives in each process, and a write
+    # only invalidates the copy in the process that served it. Turn this on
+    # only when the app runs as a single process; see cache.py.
+    LOCAL_RESPONSE_CACHE = _env_bool('LOCAL_RESPONSE_CACHE', False)
+
+    # Length of an appointment slot; a vet can't have two appointments that
+    # start less than this far apart on the same day.
+    APPOINTMENT_SLOT_MINUTES = int(os.getenv('APPOINTMENT_SLOT_MINUTES', 30))
+
+    # Vet working hours used for free-slot lookups; days are 0 (Monday) to 6.
+    VET_DAY_START = os.getenv('VET_DAY_START', '09:00')
+    VET_DAY_END = os.getenv('VET_DAY_END', '17:00')
+    VET_WORKING_DAYS = frozenset(int(day) for day in os.getenv('VET_WORKING_DAYS', '0,1,2,3,4').split(','))
+
+    # Keep the billing_monthly rollup up to date and serve billing summaries
+    # from it; run `flask rebuild-billing-rollup` after turning it on.
+    BILLING_ROLLUP = _env_bool('BILLING_ROLLUP', False)
+
+    # Refill / end-of-course reminders for medications ending within this many
+    # days. REMINDER_SCHEDULER scans every REMINDER_INTERVAL_SECONDS on a
+    # thread in each app process; leave it off and run
+    # `flask medication-reminders --every N` as a separate worker instead.
+    MEDICATION_REMINDER_DAYS = int(os.getenv('MEDICATION_REMINDER_DAYS', 7))
+    REMINDER_SCHEDULER = _env_bool('REMINDER_SCHEDULER', False)
+    REMINDER_INTERVAL_SECONDS = int(os.getenv('REMINDER_INTERVAL_SECONDS', 3600))
+
+class DevelopmentConfig(Config):
+    DEBUG = True
+    # `python app.py` / `flask run` serve from one process.
+    LOCAL_RESPONSE_CACHE = _env_bool('LOCAL_RESPONSE_CACHE', True)
+
+class ProductionConfig(Config):
+    SESSION_COOKIE_SECURE = _env_bool('SESSION_COOKIE_SECURE', True)
+
+CONFIGS = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+}
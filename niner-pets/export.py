@@ -0,0 +1,64 @@
+import csv, io, json, zlib
+from models import Pet, Medication, Billing, Appointment, Record
+
+# Streaming export of a user's (or one pet's) full history. Rows are read with
+# yield_per, which uses a server-side cursor on Postgres, and written out one
+# at a time so memory stays flat however large the export is.
+
+YIELD_PER = 500
+
+EXPORT_TABLES = {
+    'pets': Pet,
+    'medications': Medication,
+    'billing': Billing,
+    'appointments': Appointment,
+    'records': Record,
+}
+
+def export_rows(user_id, pet_id=None, tables=None):
+    """Yield (table, row_dict) for every exported row, table by table."""
+    for table in tables or EXPORT_TABLES:
+        model = EXPORT_TABLES[table]
+        query = model.query.filter_by(user_id=user_id)
+        if pet_id is not None:
+            query = query.filter((model.id if model is Pet else model.pet_id) == pet_id)
+        for row in query.order_by(model.id).yield_per(YIELD_PER):
+            yield table, row.to_dict()
+
+def _csv_fieldnames(tables):
+    fieldnames = ['table']
+    for table in tables or EXPORT_TABLES:
+        for column in EXPORT_TABLES[table].__table__.columns:
+            if column.key not in fieldnames:
+                fieldnames.append(column.key)
+    return fieldnames
+
+def ndjson_lines(rows):
+    for table, row in rows:
+        yield json.dumps({'table': table, **row}, default=str) + '\n'
+
+def csv_lines(rows, tables=None):
+    # One CSV for every table: a `table` column plus the union of all columns.
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=_csv_fieldnames(tables), restval='', extrasaction='ignore')
+    writer.writeheader()
+    for table, row in rows:
+        writer.writerow({'table': table, **row})
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+def gzip_chunks(lines, flush_every=64 * 1024):
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    pending = 0
+    for line in lines:
+        data = line.encode('utf-8')
+        pending += len(data)
+        chunk = compressor.compress(data)
+        if pending >= flush_every:
+            chunk += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if chunk:
+            yield chunk
+    yield compressor.flush()
@@ -0,0 +1,33 @@
+import multiprocessing, os
+
+# Gunicorn settings for the production app:
+#
+#   gunicorn -c gunicorn.conf.py "app:create_app('production')"
+#
+# GUNICORN_PRESET picks a worker/thread layout; GUNICORN_WORKERS and
+# GUNICORN_THREADS override it. Every worker process opens its own pool, so
+# keep threads at or below DB_POOL_SIZE + DB_MAX_OVERFLOW and no request waits
+# on the pool. The database sees up to workers * (pool size + overflow)
+# connections in total.
+
+PRESETS = {
+    # 1 vCPU dev/staging box.
+    'small': {'workers': 2, 'threads': 4},
+    # General purpose: one process per core, a few threads each for DB waits.
+    'medium': {'workers': multiprocessing.cpu_count(), 'threads': 4},
+    # I/O heavy (slow queries, remote DB): more threads per process.
+    'large': {'workers': multiprocessing.cpu_count() * 2, 'threads': 8},
+}
+
+preset = PRESETS[os.getenv('GUNICORN_PRESET', 'medium')]
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+worker_class = 'gthread'
+workers = int(os.getenv('GUNICORN_WORKERS', preset['workers']))
+threads = int(os.getenv('GUNICORN_THREADS', preset['threads']))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+keepalive = 5
+# Recycle workers now and then to cap slow memory growth.
+max_requests = 2000
+max_requests_jitter = 200
+accesslog = '-'
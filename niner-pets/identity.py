@@ -0,0 +1,68 @@
+import os, time
+from collections import OrderedDict
+from threading import Lock
+from models import db, User
+
+# Identity for JWT-authenticated requests. Tokens issued by /login carry the
+# user's id, username and email (none of which can change), so most requests
+# never touch the users table. Older tokens without those claims fall back to
+# a small in-process LRU cache of user lookups.
+
+IDENTITY_CACHE_SIZE = int(os.getenv('IDENTITY_CACHE_SIZE', 1024))
+IDENTITY_CACHE_TTL = int(os.getenv('IDENTITY_CACHE_TTL', 300))
+
+def identity_claims(user):
+    return {'username': user.username, 'email': user.email}
+
+class LRUCache:
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.stats['misses'] += 1
+                return None
+            self._data.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def info(self):
+        return {**self.stats, 'size': len(self._data), 'maxsize': self.maxsize}
+
+user_cache = LRUCache(IDENTITY_CACHE_SIZE, IDENTITY_CACHE_TTL)
+stats = {'from_token': 0}
+
+def lookup_user(user_id):
+    """Return {'id', 'username', 'email'} for a user id, or None."""
+    user = user_cache.get(user_id)
+    if user is None:
+        row = (
+            db.session.query(User.id, User.username, User.email)
+            .filter(User.id == user_id)
+            .first()
+        )
+        if row is None:
+            return None
+        user = {'id': row.id, 'username': row.username, 'email': row.email}
+        user_cache.set(user_id, user)
+    return user
+
+def current_identity(user_id, claims):
+    if 'username' in claims and 'email' in claims:
+        stats['from_token'] += 1
+        return {'id': user_id, 'username': claims['username'], 'email': claims['email']}
+    return lookup_user(user_id)
@@ -0,0 +1,215 @@
+import atexit, json, logging, os, random, sys, time
+from bisect import bisect_left
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from threading import Lock
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Per-route latency, SQL query counts and DB time, exposed in the Prometheus
+# text format on GET /metrics, plus structured logging.
+#
+# Request timing hangs off Flask's before/after_request; SQL statements are
+# counted with SQLAlchemy's cursor events on every engine and charged to the
+# request that ran them. Metrics live in the process, so with several gunicorn
+# workers each scrape sees one worker's numbers.
+#
+# Log records are JSON lines, formatted in the request thread and written by a
+# background listener, so a slow stdout never stalls a request. Routine events
+# are sampled at LOG_SAMPLE_RATE; errors and requests slower than
+# SLOW_REQUEST_MS are always logged.
+
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', 0.01))
+SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', 500))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+class Histogram:
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+        self._lock = Lock()
+
+    def observe(self, label_values, value):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        for label_values, (counts, total, count) in sorted(series.items()):
+            labels = _labels(self.labels, label_values)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total}')
+            lines.append(f'{self.name}_count{{{labels}}} {count}')
+        return lines
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = Lock()
+
+    def inc(self, label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = dict(self._values)
+        for label_values, value in sorted(values.items()):
+            lines.append(f'{self.name}{{{_labels(self.labels, label_values)}}} {value}')
+        return lines
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(names, values):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+request_latency = Histogram(
+    'ninerpets_request_duration_seconds', 'Request latency by route.',
+    ('method', 'route'), LATENCY_BUCKETS,
+)
+requests_total = Counter(
+    'ninerpets_requests_total', 'Requests by route and status code.',
+    ('method', 'route', 'status'),
+)
+request_queries = Histogram(
+    'ninerpets_request_db_queries', 'SQL statements per request by route.',
+    ('method', 'route'), QUERY_COUNT_BUCKETS,
+)
+db_seconds_total = Counter(
+    'ninerpets_db_seconds_total', 'Time spent executing SQL by route.',
+    ('method', 'route'),
+)
+db_queries_total = Counter(
+    'ninerpets_db_queries_total', 'SQL statements executed by route.',
+    ('method', 'route'),
+)
+
+METRICS = [request_latency, requests_total, request_queries, db_queries_total, db_seconds_total]
+
+# Numbers kept by other modules (cache hits and the like), read at scrape
+# time: name -> (metric type, help text, callable returning the value).
+collected = {}
+
+def render():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    for name, (metric_type, help_text, read_value) in sorted(collected.items()):
+        lines.extend([f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}', f'{name} {read_value()}'])
+    return '\n'.join(lines) + '\n'
+
+# Structured logging
+
+logger = logging.getLogger('ninerpets')
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname.lower(),
+            'event': record.getMessage(),
+            **getattr(record, 'fields', {}),
+        }
+        return json.dumps(entry, default=str)
+
+def _start_log_listener():
+    queue = SimpleQueue()
+    handler = QueueHandler(queue)
+    handler.setFormatter(JsonFormatter())
+    listener = QueueListener(queue, logging.StreamHandler(sys.stdout))
+    listener.start()
+    atexit.register(listener.stop)
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+def log_event(name, level=logging.INFO, sampled=True, **fields):
+    """Log one structured event; routine (sampled) events only at LOG_SAMPLE_RATE."""
+    if sampled and random.random() >= LOG_SAMPLE_RATE:
+        return
+    if has_request_context():
+        fields.setdefault('route', _route())
+    logger.log(level, name, extra={'fields': fields})
+
+# Hooks
+
+def _route():
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_started'].pop()
+    if has_request_context() and 'request_started' in g:
+        g.db_queries += 1
+        g.db_seconds += time.perf_counter() - started
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute.
+    started = context.connection.info.get('query_started') if context.connection else None
+    if started:
+        started.pop()
+
+def _before_request():
+    g.request_started = time.perf_counter()
+    g.db_queries = 0
+    g.db_seconds = 0.0
+
+def _after_request(response):
+    if 'request_started' not in g:
+        return response
+    elapsed = time.perf_counter() - g.request_started
+    labels = (request.method, _route())
+    request_latency.observe(labels, elapsed)
+    requests_total.inc(labels + (response.status_code,))
+    request_queries.observe(labels, g.db_queries)
+    db_queries_total.inc(labels, g.db_queries)
+    db_seconds_total.inc(labels, g.db_seconds)
+
+    slow = elapsed * 1000 >= SLOW_REQUEST_MS
+    failed = response.status_code >= 500
+    log_event(
+        'request', level=logging.WARNING if slow or failed else logging.INFO,
+        sampled=not (slow or failed), method=request.method, status=response.status_code,
+        duration_ms=round(elapsed * 1000, 2), db_queries=g.db_queries,
+        db_ms=round(g.db_seconds * 1000, 2),
+    )
+    return response
+
+_engine_hooks_installed = False
+
+def init_app(app):
+    global _engine_hooks_installed
+    if not _engine_hooks_installed:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+        _start_log_listener()
+        _engine_hooks_installed = True
+    app.before_request(_before_request)
+    app.after_request(_after_request)
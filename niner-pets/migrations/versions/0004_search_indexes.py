@@ -0,0 +1,57 @@
+"""search indexes
+
+Revision ID: 0004_search_indexes
+Revises: 0003_vet_schedule_index
+Create Date: 2026-10-18 16:52:07.118406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_search_indexes'
+down_revision = '0003_vet_schedule_index'
+branch_labels = None
+depends_on = None
+
+
+# table -> searchable text columns (see search.SEARCH_DOCUMENTS)
+DOCUMENTS = {
+    'records': ('name', 'description'),
+    'medications': ('name', 'description', 'side_effects', 'instructions'),
+    'vets': ('name', 'specialty', 'information'),
+}
+
+
+def _body(columns, prefix=''):
+    return " || ' ' || ".join(f"coalesce({prefix}{name}, '')" for name in columns)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    for table, columns in DOCUMENTS.items():
+        if dialect == 'postgresql':
+            op.execute(
+                f"CREATE INDEX ix_{table}_search ON {table} "
+                f"USING gin (to_tsvector('english', {_body(columns)}))"
+            )
+        elif dialect == 'sqlite':
+            insert = f"INSERT INTO {table}_fts (rowid, body) VALUES (new.id, {_body(columns, 'new.')});"
+            delete = f"DELETE FROM {table}_fts WHERE rowid = old.id;"
+            op.execute(f"CREATE VIRTUAL TABLE {table}_fts USING fts5(body, tokenize='porter')")
+            op.execute(f"INSERT INTO {table}_fts (rowid, body) SELECT id, {_body(columns)} FROM {table}")
+            op.execute(f"CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} BEGIN {insert} END")
+            op.execute(f"CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} BEGIN {delete} END")
+            op.execute(f"CREATE TRIGGER {table}_fts_update AFTER UPDATE ON {table} BEGIN {delete} {insert} END")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for table in DOCUMENTS:
+        if dialect == 'postgresql':
+            op.execute(f"DROP INDEX ix_{table}_search")
+        elif dialect == 'sqlite':
+            for action in ('insert', 'delete', 'update'):
+                op.execute(f"DROP TRIGGER {table}_fts_{action}")
+            op.execute(f"DROP TABLE {table}_fts")
@@ -1,9 +1,10 @@
 
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from passwords import hash_password, needs_rehash, verify_password
+from replicas import RoutingSession
 from datetime import date
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -14,10 +15,13 @@ class User(db.Model):
     password = db.Column(db.String(255), nullable=False)  
 
     def set_password(self, password):
-        self.password = generate_password_hash(password)
+        self.password = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password, password)
+        return verify_password(self.password, password)
+
+    def password_needs_rehash(self):
+        return needs_rehash(self.password)
 
 class Vet(db.Model):
     __tablename__ = 'vets'  
@@ -36,6 +40,9 @@ class Vet(db.Model):
 
 class Pet(db.Model):
     __tablename__ = 'pets'
+    __table_args__ = (
+        db.Index('ix_pets_user_id', 'user_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     name = db.Column(db.String(255), nullable=False)
@@ -43,6 +50,7 @@ class Pet(db.Model):
     breed = db.Column(db.String(100), nullable=False)
     dob = db.Column(db.Date, nullable=False)
     weight = db.Column(db.Numeric(5, 2), nullable=False)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
 
     user = db.relationship('User', backref=db.backref('pets', lazy=True))
 
@@ -59,6 +67,11 @@ class Pet(db.Model):
 
 class Medication(db.Model):
     __tablename__ = 'medications'
+    __table_args__ = (
+        db.Index('ix_medications_user_id_start_date', 'user_id', 'start_date'),
+        db.Index('ix_medications_pet_id', 'pet_id'),
+        db.Index('ix_medications_end_date_refill', 'end_date', 'refill'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     pet_id = db.Column(db.Integer, db.ForeignKey('pets.id'), nullable=False)
@@ -72,6 +85,7 @@ class Medication(db.Model):
     instructions = db.Column(db.Text, nullable=True)
     refill = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
 
     pet = db.relationship('Pet', backref=db.backref('medications', lazy=True))
     user = db.relationship('User', backref=db.backref('medications', lazy=True))
@@ -92,17 +106,39 @@ class Medication(db.Model):
             'created_at': self.created_at.isoformat(),
         }
     
+# Refill and end-of-course reminders written by reminders.py. One row per
+# medication, kind and due date, so rescanning never writes a duplicate.
+class MedicationReminder(db.Model):
+    __tablename__ = 'medication_reminders'
+    __table_args__ = (
+        db.UniqueConstraint('medication_id', 'kind', 'due_date', name='uq_medication_reminders_medication_kind_due'),
+        db.Index('ix_medication_reminders_user_id_due_date', 'user_id', 'due_date'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    pet_id = db.Column(db.Integer, db.ForeignKey('pets.id'), nullable=False)
+    medication_id = db.Column(db.Integer, db.ForeignKey('medications.id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)
+    due_date = db.Column(db.Date, nullable=False)
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
 class Billing(db.Model):
     __tablename__ = 'billing'
+    __table_args__ = (
+        db.Index('ix_billing_user_id_date', 'user_id', 'date'),
+        db.Index('ix_billing_pet_id', 'pet_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     pet_id = db.Column(db.Integer, db.ForeignKey('pets.id'), nullable=False)
     type = db.Column(db.String(50), nullable=False)
-    price = db.Column(db.Float, nullable=False)  
+    price = db.Column(db.Numeric(10, 2), nullable=False)
     description = db.Column(db.Text, nullable=True)
     date = db.Column(db.Date, nullable=False)
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
 
     user = db.relationship('User', backref=db.backref('billings', lazy=True))
     pet = db.relationship('Pet', backref=db.backref('billings', lazy=True))
@@ -118,9 +154,27 @@ class Billing(db.Model):
             'date': self.date.isoformat(),
             'created_at': self.created_at.isoformat(),
         }
+
+# Billing totals per user, pet, type and calendar month, kept in step with the
+# billing table by reports.py when BILLING_ROLLUP is on. Derived data, so no
+# foreign keys: a deleted pet's rows are removed along with the pet.
+class BillingMonthly(db.Model):
+    __tablename__ = 'billing_monthly'
+
+    user_id = db.Column(db.Integer, primary_key=True)
+    pet_id = db.Column(db.Integer, primary_key=True)
+    type = db.Column(db.String(50), primary_key=True)
+    month = db.Column(db.Date, primary_key=True)
+    total = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    entries = db.Column(db.Integer, nullable=False, default=0)
     
 class Appointment(db.Model):
     __tablename__ = 'appointments'
+    __table_args__ = (
+        db.Index('ix_appointments_user_id_date', 'user_id', 'date'),
+        db.Index('ix_appointments_pet_id', 'pet_id'),
+        db.Index('ix_appointments_vet_id_date_time', 'vet_id', 'date', 'time'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -132,6 +186,7 @@ class Appointment(db.Model):
     location = db.Column(db.String(255), nullable=False)
     notes = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
 
     user = db.relationship('User', backref=db.backref('appointments', lazy=True))
     pet = db.relationship('Pet', backref=db.backref('appointments', lazy=True))
@@ -153,6 +208,10 @@ class Appointment(db.Model):
 
 class Record(db.Model):
     __tablename__ = 'records'
+    __table_args__ = (
+        db.Index('ix_records_user_id_date', 'user_id', 'date'),
+        db.Index('ix_records_pet_id', 'pet_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -162,6 +221,7 @@ class Record(db.Model):
     date = db.Column(db.Date, nullable=False, default=date.today)
     description = db.Column(db.Text, nullable=False)
     record_type = db.Column(db.String(255), nullable=False)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
 
     user = db.relationship('User', backref=db.backref('records', lazy=True))
     pet = db.relationship('Pet', backref=db.backref('records', lazy=True))
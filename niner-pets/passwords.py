@@ -0,0 +1,68 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Password hashing with a configurable cost, set from the app config by
+# init_app(). PASSWORD_HASH_METHOD takes a full Werkzeug method string, e.g.
+# 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'; hashes stored under any other
+# method are upgraded on the next login.
+#
+# Verification runs on a small, bounded thread pool (hashlib releases the GIL
+# while hashing). When too many checks are already queued, verify_password
+# fails fast with HashPoolBusy instead of piling CPU work onto the workers.
+
+HASH_METHOD = 'scrypt:32768:8:1'
+HASH_WORKERS = os.cpu_count() or 2
+HASH_MAX_PENDING = HASH_WORKERS * 4
+
+_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix='password-hash')
+_slots = BoundedSemaphore(HASH_MAX_PENDING)
+
+class HashPoolBusy(RuntimeError):
+    pass
+
+def hash_password(password):
+    return generate_password_hash(password, method=HASH_METHOD)
+
+def _method_prefix(method):
+    """The method prefix Werkzeug writes for method, with any parameters it
+    leaves out filled in ('pbkdf2:sha256' is stored as 'pbkdf2:sha256:600000')."""
+    return generate_password_hash('', method).split('$', 1)[0]
+
+_HASH_PREFIX = _method_prefix(HASH_METHOD)
+
+def init_app(app):
+    """Use the app's PASSWORD_HASH_METHOD, PASSWORD_HASH_WORKERS and
+    PASSWORD_HASH_MAX_PENDING. The pool is rebuilt only when its size changes;
+    checks already queued finish on the old one."""
+    global HASH_METHOD, HASH_WORKERS, HASH_MAX_PENDING, _HASH_PREFIX, _executor, _slots
+    if app.config['PASSWORD_HASH_METHOD'] != HASH_METHOD:
+        HASH_METHOD = app.config['PASSWORD_HASH_METHOD']
+        _HASH_PREFIX = _method_prefix(HASH_METHOD)
+    if app.config['PASSWORD_HASH_WORKERS'] != HASH_WORKERS:
+        HASH_WORKERS = app.config['PASSWORD_HASH_WORKERS']
+        _executor.shutdown(wait=False)
+        _executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix='password-hash')
+    if app.config['PASSWORD_HASH_MAX_PENDING'] != HASH_MAX_PENDING:
+        HASH_MAX_PENDING = app.config['PASSWORD_HASH_MAX_PENDING']
+        _slots = BoundedSemaphore(HASH_MAX_PENDING)
+
+def needs_rehash(pwhash):
+    return pwhash.split('$', 1)[0] != _HASH_PREFIX
+
+def submit_verify(pwhash, password):
+    """Queue a hash check on the pool and return its Future."""
+    slots = _slots
+    if not slots.acquire(blocking=False):
+        raise HashPoolBusy('Too many password checks in progress.')
+    try:
+        future = _executor.submit(check_password_hash, pwhash, password)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return future
+
+def verify_password(pwhash, password):
+    return submit_verify(pwhash, password).result()
@@ -0,0 +1,322 @@
+import base64, json
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+from sqlalchemy import or_, select, tuple_
+from models import db, Vet, Pet, Medication, MedicationReminder, Billing, Appointment, Record
+
+# Shared read queries for the list endpoints. Each selects just the columns
+# its response needs, related pet/vet names included, so a page is one SELECT
+# and never triggers a lazy load per row.
+#
+# These run in read-only mode (see read()): Core statements executed on the
+# session's connection, returning plain Row tuples without autoflush, identity
+# map or attribute instrumentation.
+#
+# Every list is ordered by (date, id) and paged with a keyset cursor, so a
+# page costs the same no matter how far into a user's history it is.
+
+MAX_PAGE_SIZE = 500
+
+ListArgs = namedtuple('ListArgs', 'pet_id start end limit cursor')
+Page = namedtuple('Page', 'items next_cursor')
+
+NO_LIST_ARGS = ListArgs(None, None, None, None, None)
+
+def read(statement):
+    # Same connection and transaction as the session, so a request still sees
+    # its own writes, but nothing is flushed and no ORM objects are built.
+    return db.session.connection().execute(statement).all()
+
+def read_one(statement):
+    return db.session.connection().execute(statement).first()
+
+def encode_cursor(date_value, id_value):
+    raw = json.dumps([date_value.isoformat() if date_value else None, id_value])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        date_value, id_value = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if date_value is not None:
+            date_value = datetime.strptime(date_value, '%Y-%m-%d').date()
+        return date_value, int(id_value)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor.')
+
+def parse_list_args(args):
+    """Read pet_id/start/end/limit/cursor from a request's query string.
+
+    Raises ValueError with a message suitable for a 400 response.
+    """
+    pet_id = args.get('pet_id')
+    if pet_id is not None:
+        try:
+            pet_id = int(pet_id)
+        except ValueError:
+            raise ValueError('pet_id must be a valid integer.')
+
+    dates = []
+    for name in ('start', 'end'):
+        value = args.get(name)
+        if value:
+            try:
+                value = datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                raise ValueError('Invalid date format. Please use YYYY-MM-DD.')
+        dates.append(value or None)
+
+    limit = args.get('limit')
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError('limit must be a valid integer.')
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f'limit must be between 1 and {MAX_PAGE_SIZE}.')
+
+    cursor = args.get('cursor')
+    cursor = decode_cursor(cursor) if cursor else None
+
+    return ListArgs(pet_id, dates[0], dates[1], limit, cursor)
+
+# A list endpoint's base SELECT plus the columns used to filter and page it.
+ListQuery = namedtuple('ListQuery', 'base id_column date_column pet_column')
+
+def page_statement(list_query, list_args):
+    query, id_column, date_column, pet_column = list_query
+    if list_args.pet_id is not None and pet_column is not None:
+        query = query.where(pet_column == list_args.pet_id)
+    if date_column is not None:
+        if list_args.start:
+            query = query.where(date_column >= list_args.start)
+        if list_args.end:
+            query = query.where(date_column <= list_args.end)
+
+    key_columns = [id_column] if date_column is None else [date_column, id_column]
+    if list_args.cursor:
+        last_date, last_id = list_args.cursor
+        if date_column is None or last_date is None:
+            query = query.where(id_column > last_id)
+        else:
+            query = query.where(tuple_(date_column, id_column) > tuple_(last_date, last_id))
+    query = query.order_by(*key_columns)
+
+    if list_args.limit is not None:
+        query = query.limit(list_args.limit + 1)
+    return query
+
+def to_page(rows, list_query, list_args):
+    if list_args.limit is None or len(rows) <= list_args.limit:
+        return Page(rows, None)
+    rows = rows[:list_args.limit]
+    last = rows[-1]
+    date_column = list_query.date_column
+    last_date = getattr(last, date_column.key) if date_column is not None else None
+    return Page(rows, encode_cursor(last_date, last.id))
+
+def paginate(list_query, list_args):
+    return to_page(read(page_statement(list_query, list_args)), list_query, list_args)
+
+# Column lists for each list endpoint, in the field order of the matching
+# Struct in schemas.py.
+VET_COLUMNS = (Vet.id, Vet.name, Vet.specialty, Vet.information)
+PET_COLUMNS = (Pet.id, Pet.user_id, Pet.name, Pet.species, Pet.breed, Pet.dob, Pet.weight, Pet.version)
+MEDICATION_COLUMNS = (
+    Medication.id, Medication.pet_id, Medication.user_id, Medication.name, Medication.dosage,
+    Medication.description, Medication.start_date, Medication.end_date, Medication.side_effects,
+    Medication.instructions, Medication.refill, Medication.created_at, Pet.name.label("pet_name"),
+    Medication.version,
+)
+BILLING_COLUMNS = (
+    Billing.id, Billing.user_id, Billing.pet_id, Billing.type, Billing.price,
+    Billing.description, Billing.date, Pet.name.label("pet_name"), Billing.version,
+)
+APPOINTMENT_COLUMNS = (
+    Appointment.id, Appointment.user_id, Appointment.pet_id, Appointment.date, Appointment.vet_id,
+    Appointment.reason, Appointment.time, Appointment.location, Appointment.notes, Appointment.version,
+)
+RECORD_COLUMNS = (
+    Record.id, Record.pet_id, Pet.name.label("pet_name"), Record.name, Record.date,
+    Record.description, Record.vet_id, Vet.name.label("vet_name"), Record.record_type, Record.version,
+)
+
+def get_pet(pet_id):
+    return read_one(select(*PET_COLUMNS).where(Pet.id == pet_id))
+
+def vets_list():
+    return ListQuery(select(*VET_COLUMNS), Vet.id, None, None)
+
+def pets_list(user_id):
+    return ListQuery(select(*PET_COLUMNS).where(Pet.user_id == user_id), Pet.id, None, Pet.id)
+
+def medications_list(user_id):
+    query = (
+        select(*MEDICATION_COLUMNS)
+        .join(Pet, Medication.pet_id == Pet.id)
+        .where(Medication.user_id == user_id)
+    )
+    return ListQuery(query, Medication.id, Medication.start_date, Medication.pet_id)
+
+def billing_list(user_id):
+    query = (
+        select(*BILLING_COLUMNS)
+        .join(Pet, Billing.pet_id == Pet.id)
+        .where(Billing.user_id == user_id)
+    )
+    return ListQuery(query, Billing.id, Billing.date, Billing.pet_id)
+
+def appointments_list(user_id):
+    query = select(*APPOINTMENT_COLUMNS).where(Appointment.user_id == user_id)
+    return ListQuery(query, Appointment.id, Appointment.date, Appointment.pet_id)
+
+def records_list(user_id):
+    query = (
+        select(*RECORD_COLUMNS)
+        .join(Pet, Record.pet_id == Pet.id)
+        .join(Vet, Record.vet_id == Vet.id)
+        .where(Record.user_id == user_id)
+    )
+    return ListQuery(query, Record.id, Record.date, Record.pet_id)
+
+def get_vets(list_args=NO_LIST_ARGS):
+    return paginate(vets_list(), list_args)
+
+def get_pets_by_user_id(user_id, list_args=NO_LIST_ARGS):
+    return paginate(pets_list(user_id), list_args)
+
+def get_medications_by_user_id(user_id, list_args=NO_LIST_ARGS):
+    return paginate(medications_list(user_id), list_args)
+
+def get_billing_by_user_id(user_id, list_args=NO_LIST_ARGS):
+    return paginate(billing_list(user_id), list_args)
+
+def get_appointments_by_user_id(user_id, list_args=NO_LIST_ARGS):
+    return paginate(appointments_list(user_id), list_args)
+
+def get_records_by_user_id(user_id, list_args=NO_LIST_ARGS):
+    return paginate(records_list(user_id), list_args)
+
+def lock_vet_schedule(vet_id):
+    """Lock the vet's row until the transaction ends (SELECT ... FOR UPDATE on
+    Postgres; SQLite ignores it and serializes writers itself).
+
+    Bookings take this before their conflict check, so two requests for the
+    same vet check and insert one after the other instead of both passing the
+    check. An empty day has no appointment rows to lock, hence the vet row.
+    """
+    read_one(select(Vet.id).where(Vet.id == vet_id).with_for_update())
+
+def find_conflicting_appointment(vet_id, day, start, slot_minutes, exclude_id=None):
+    """Id of an appointment with the same vet whose slot overlaps one starting
+    at `start` on `day`, or None.
+
+    Two slots overlap when their start times are less than a slot apart, so
+    this is a single range probe on the (vet_id, date, time) index.
+    """
+    slot = timedelta(minutes=slot_minutes)
+    starts_at = datetime.combine(day, start)
+    day_start = datetime.combine(day, time.min)
+    upper = min(starts_at + slot, datetime.combine(day, time.max)).time()
+    query = (
+        select(Appointment.id)
+        .where(Appointment.vet_id == vet_id, Appointment.date == day)
+        .where(Appointment.time < upper)
+    )
+    if starts_at - slot >= day_start:
+        query = query.where(Appointment.time > (starts_at - slot).time())
+    if exclude_id is not None:
+        query = query.where(Appointment.id != exclude_id)
+    row = read_one(query.limit(1))
+    return row.id if row else None
+
+def get_vet_bookings(vet_ids, start, end):
+    """(vet_id, date, time) of every appointment for `vet_ids` between `start`
+    and `end`, in index order: one range scan per vet on (vet_id, date, time).
+    """
+    query = (
+        select(Appointment.vet_id, Appointment.date, Appointment.time)
+        .where(Appointment.vet_id.in_(vet_ids))
+        .where(Appointment.date >= start, Appointment.date <= end)
+        .order_by(Appointment.vet_id, Appointment.date, Appointment.time)
+    )
+    return read(query)
+
+def get_pet_vet_ids(pet_id):
+    query = (
+        select(Appointment.vet_id)
+        .where(Appointment.pet_id == pet_id)
+        .distinct()
+    )
+    return [row.vet_id for row in read(query)]
+
+def get_active_medications_by_user_id(user_id, today):
+    query = (
+        select(*MEDICATION_COLUMNS)
+        .join(Pet, Medication.pet_id == Pet.id)
+        .where(Medication.user_id == user_id)
+        .where(or_(Medication.end_date.is_(None), Medication.end_date >= today))
+        .order_by(Medication.start_date, Medication.id)
+    )
+    return read(query)
+
+def get_upcoming_reminders_by_user_id(user_id, today):
+    query = (
+        select(
+            MedicationReminder.id, MedicationReminder.medication_id, Medication.name.label("medication_name"),
+            MedicationReminder.pet_id, Pet.name.label("pet_name"), MedicationReminder.kind,
+            MedicationReminder.due_date,
+        )
+        .join(Medication, MedicationReminder.medication_id == Medication.id)
+        .join(Pet, MedicationReminder.pet_id == Pet.id)
+        .where(MedicationReminder.user_id == user_id, MedicationReminder.due_date >= today)
+        .order_by(MedicationReminder.due_date, MedicationReminder.id)
+    )
+    return read(query)
+
+def get_recent_billing_by_user_id(user_id, limit):
+    query = (
+        select(*BILLING_COLUMNS)
+        .join(Pet, Billing.pet_id == Pet.id)
+        .where(Billing.user_id == user_id)
+        .order_by(Billing.date.desc(), Billing.id.desc())
+        .limit(limit)
+    )
+    return read(query)
+
+# Per-user / per-pet lookups that must be served by an index, paired with the
+# index the planner is expected to pick (see the __table_args__ in models.py).
+def hot_queries(user_id=1, pet_id=1):
+    return [
+        ('pets by user', Pet.query.filter_by(user_id=user_id), 'ix_pets_user_id'),
+        ('medications by user', Medication.query.filter_by(user_id=user_id), 'ix_medications_user_id_start_date'),
+        ('billing by user', Billing.query.filter_by(user_id=user_id), 'ix_billing_user_id_date'),
+        ('appointments by user', Appointment.query.filter_by(user_id=user_id), 'ix_appointments_user_id_date'),
+        ('records by user', Record.query.filter_by(user_id=user_id), 'ix_records_user_id_date'),
+        ('medications by pet', Medication.query.filter_by(pet_id=pet_id), 'ix_medications_pet_id'),
+        ('billing by pet', Billing.query.filter_by(pet_id=pet_id), 'ix_billing_pet_id'),
+        ('appointments by pet', Appointment.query.filter_by(pet_id=pet_id), 'ix_appointments_pet_id'),
+        ('appointments by vet slot', Appointment.query.filter_by(vet_id=1, date=datetime(2024, 1, 1).date()),
+         'ix_appointments_vet_id_date_time'),
+        ('records by pet', Record.query.filter_by(pet_id=pet_id), 'ix_records_pet_id'),
+        ('medications ending soon', Medication.query.filter(Medication.end_date.between(
+            datetime(2024, 1, 1).date(), datetime(2024, 1, 8).date())), 'ix_medications_end_date_refill'),
+    ]
+
+def explain_hot_queries():
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        # Tiny dev tables are cheaper to scan, so make the planner show whether
+        # the index is usable at all.
+        db.session.execute(db.text('SET LOCAL enable_seqscan = off'))
+        explain = 'EXPLAIN'
+    else:
+        explain = 'EXPLAIN QUERY PLAN'
+
+    results = []
+    for label, query, index_name in hot_queries():
+        sql = query.statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+        plan = '\n'.join(str(row[-1]) for row in db.session.execute(db.text(f'{explain} {sql}')))
+        results.append((label, index_name, index_name in plan, plan))
+    db.session.rollback()
+    return results
@@ -0,0 +1,127 @@
+import atexit, logging, threading
+from datetime import datetime, timedelta
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, Medication, MedicationReminder
+from queries import read
+import instrumentation
+
+# Medication reminders: every medication whose end_date falls within the next
+# MEDICATION_REMINDER_DAYS gets a 'refill' reminder (refill set) or an
+# 'expiry' reminder (course ending) for its user.
+#
+# The scan is a range over the (end_date, refill) index, read in keyset order
+# (end_date, id) in chunks of CHUNK_SIZE, each chunk's reminders inserted and
+# committed together. Reminders are unique per medication, kind and due date
+# and inserted with ON CONFLICT DO NOTHING, so a scan can be repeated, cut
+# short or run by several processes at once without writing duplicates.
+#
+# It never runs in a request: either a daemon thread per app process
+# (REMINDER_SCHEDULER) or `flask medication-reminders --every N` as a
+# separate worker.
+
+CHUNK_SIZE = 500
+
+REFILL = 'refill'
+EXPIRY = 'expiry'
+
+stats = {'runs': 0, 'scanned': 0, 'created': 0, 'failures': 0}
+
+def _insert_ignoring_duplicates(rows):
+    insert_for = postgresql.insert if db.engine.dialect.name == 'postgresql' else sqlite.insert
+    statement = insert_for(MedicationReminder).on_conflict_do_nothing(
+        index_elements=['medication_id', 'kind', 'due_date'],
+    )
+    # On the session's connection, for a Core result that has a rowcount.
+    result = db.session.connection().execute(statement, rows)
+    return max(result.rowcount, 0)
+
+def _ending_between(start, end, after, limit):
+    query = (
+        select(Medication.id, Medication.user_id, Medication.pet_id, Medication.end_date, Medication.refill)
+        .where(Medication.end_date >= start, Medication.end_date <= end)
+        .order_by(Medication.end_date, Medication.id)
+        .limit(limit)
+    )
+    if after is not None:
+        query = query.where(tuple_(Medication.end_date, Medication.id) > after)
+    return read(query)
+
+def scan(days, today=None, chunk_size=CHUNK_SIZE):
+    """Write reminders for medications ending within `days` of `today`.
+
+    Returns (medications scanned, reminders created).
+    """
+    today = today or datetime.utcnow().date()
+    end = today + timedelta(days=days)
+    scanned = created = 0
+    after = None
+    while True:
+        rows = _ending_between(today, end, after, chunk_size)
+        if not rows:
+            break
+        created += _insert_ignoring_duplicates([
+            {'user_id': row.user_id, 'pet_id': row.pet_id, 'medication_id': row.id,
+             'kind': REFILL if row.refill else EXPIRY, 'due_date': row.end_date}
+            for row in rows
+        ])
+        db.session.commit()
+        scanned += len(rows)
+        after = (rows[-1].end_date, rows[-1].id)
+        if len(rows) < chunk_size:
+            break
+    stats['runs'] += 1
+    stats['scanned'] += scanned
+    stats['created'] += created
+    return scanned, created
+
+def forget_medication(medication_id):
+    """Drop a medication's reminders; call before deleting it or changing its
+    end date or refill flag (the next scan writes the right ones)."""
+    db.session.execute(delete(MedicationReminder).where(MedicationReminder.medication_id == medication_id))
+
+def forget_pet(pet_id):
+    db.session.execute(delete(MedicationReminder).where(MedicationReminder.pet_id == pet_id))
+
+def run_scheduled(app):
+    """One scan in its own app context; failures are logged, not raised."""
+    with app.app_context():
+        try:
+            scanned, created = scan(app.config['MEDICATION_REMINDER_DAYS'])
+            instrumentation.log_event('reminders.scan', sampled=False, scanned=scanned, created=created)
+        except Exception as e:
+            db.session.rollback()
+            stats['failures'] += 1
+            instrumentation.log_event('reminders.failed', level=logging.ERROR, sampled=False, error=str(e))
+        finally:
+            db.session.remove()
+
+class Scheduler:
+    """Runs a scan every `interval` seconds on a daemon thread."""
+
+    def __init__(self, app, interval):
+        self.app = app
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='medication-reminders', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            run_scheduled(self.app)
+            self._stopped.wait(self.interval)
+
+_scheduler = None
+
+def init_app(app):
+    # One scheduler per process, even when several apps are created in it.
+    global _scheduler
+    if app.config['REMINDER_SCHEDULER'] and _scheduler is None:
+        _scheduler = Scheduler(app, app.config['REMINDER_INTERVAL_SECONDS'])
+        _scheduler.start()
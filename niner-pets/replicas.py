@@ -0,0 +1,87 @@
+import random, time
+from functools import wraps
+from flask import current_app, g, has_request_context, request
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+import cache
+from config import REPLICA_BIND_PREFIX
+
+# Read replica routing. Replica URLs (DATABASE_REPLICA_URLS) become
+# Flask-SQLAlchemy binds named replica0, replica1, ...; views marked with
+# @read_only() run their queries on one replica picked per request, and
+# everything else, including any flush, goes to the primary.
+#
+# Read-your-writes: a user's own writes bump their cache generation (see
+# cache.py), which is the time of that write. For REPLICA_STICKY_SECONDS
+# after it their reads stay on the primary, so a page reloaded right after a
+# save never shows the replica's older copy. The generation lives in the
+# cache backend, and an in-process backend only knows this worker's writes, so
+# unless cache.enabled() (Redis, or a single process) every read stays on the
+# primary. A user with no generation yet gets one on their first cached read,
+# which then counts as a write; that only errs towards the primary.
+#
+# Keep the window above the replicas' usual lag. Views without a user scope
+# (GET /pets/<id>) stay on the primary.
+
+stats = {'replica': 0, 'sticky': 0, 'unshared': 0}
+
+def _user_scope():
+    user_id = request.args.get('user_id')
+    if user_id is None:
+        try:
+            user_id = get_jwt_identity()
+        except RuntimeError:
+            # Not a JWT-protected view.
+            return None
+    try:
+        return f'user:{int(user_id)}'
+    except (TypeError, ValueError):
+        return None
+
+def read_only(scope=_user_scope):
+    """Send a GET view's queries to a replica unless the scope (the requesting
+    user by default; a callable or a fixed name) was written to within
+    REPLICA_STICKY_SECONDS. A callable may return a list of scopes, which
+    keeps the reads on the primary when any of them was written to."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            g.replica_scope = scope
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _recently_written(scope_keys, window):
+    last_write = cache.last_write(*scope_keys) if scope_keys else None
+    return last_write is not None and time.time() - last_write / 1e6 < window
+
+def _choose_replica(engines):
+    # Decided on the request's first query and kept for the rest of it, so a
+    # request never mixes two replicas.
+    if 'replica_engine' not in g:
+        replicas = [engine for key, engine in engines.items() if key and key.startswith(REPLICA_BIND_PREFIX)]
+        scope = g.replica_scope
+        scope_keys = scope() if callable(scope) else scope
+        if isinstance(scope_keys, str):
+            scope_keys = [scope_keys]
+        if not replicas:
+            g.replica_engine = None
+        elif not cache.enabled():
+            stats['unshared'] += 1
+            g.replica_engine = None
+        elif _recently_written(scope_keys, current_app.config['REPLICA_STICKY_SECONDS']):
+            stats['sticky'] += 1
+            g.replica_engine = None
+        else:
+            stats['replica'] += 1
+            g.replica_engine = random.choice(replicas)
+    return g.replica_engine
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and not getattr(clause, 'is_dml', False)
+                and has_request_context() and 'replica_scope' in g):
+            replica = _choose_replica(self._db.engines)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,156 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from flask import current_app
+from sqlalchemy import Date, Integer, cast, delete, func, insert, literal_column, select
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, Billing, BillingMonthly, Pet
+from queries import read
+
+# Billing summaries: total, count and average price per pet, type or month,
+# computed with GROUP BY in the database.
+#
+# With BILLING_ROLLUP on, every billing write also adds its delta to the
+# billing_monthly rollup in the same transaction, and summaries over whole
+# months are read from there instead of from every billing row. Run
+# `flask rebuild-billing-rollup` once after turning it on.
+
+GROUPINGS = ('pet', 'type', 'month')
+
+def rollup_enabled():
+    return current_app.config['BILLING_ROLLUP']
+
+def _month_start(day):
+    return day.replace(day=1)
+
+def _month_label(column):
+    if db.engine.dialect.name == 'postgresql':
+        return func.to_char(column, literal_column("'YYYY-MM'"))
+    return func.strftime('%Y-%m', column)
+
+def _month_start_sql(column):
+    if db.engine.dialect.name == 'postgresql':
+        return cast(func.date_trunc(literal_column("'month'"), column), Date)
+    return func.date(column, 'start of month')
+
+# Money is summed exactly: NUMERIC sums are exact on Postgres, but SQLite keeps
+# NUMERIC values as REAL, so there the sum is taken over whole cents.
+def _money_sum(column):
+    if db.engine.dialect.name == 'postgresql':
+        return func.sum(column)
+    return func.sum(cast(func.round(column * 100), Integer))
+
+def _to_money(total):
+    if db.engine.dialect.name == 'postgresql':
+        return total
+    return Decimal(total).scaleb(-2)
+
+def _whole_months(start, end):
+    return ((start is None or start.day == 1)
+            and (end is None or (end + timedelta(days=1)).day == 1))
+
+def _summary_statement(source, date_column, total, count, user_id, group_by, start, end):
+    if group_by == 'pet':
+        keys = (source.pet_id, Pet.name)
+    elif group_by == 'type':
+        keys = (source.type,)
+    else:
+        keys = (_month_label(date_column),)
+
+    query = (
+        select(*keys, total, count)
+        .where(source.user_id == user_id)
+        .group_by(*keys)
+        .having(count > 0)
+        .order_by(*keys)
+    )
+    if group_by == 'pet':
+        query = query.join(Pet, source.pet_id == Pet.id)
+    if start:
+        query = query.where(date_column >= start)
+    if end:
+        query = query.where(date_column <= end)
+    return query
+
+def billing_summary(user_id, group_by, start=None, end=None):
+    """Rows of (key, pet_name, total, count) for one grouping, in key order;
+    totals are Decimals.
+
+    The billing scan is served by ix_billing_user_id_date; the rollup by its
+    primary key, which also leads with user_id.
+    """
+    if rollup_enabled() and _whole_months(start, end):
+        query = _summary_statement(
+            BillingMonthly, BillingMonthly.month,
+            _money_sum(BillingMonthly.total), func.sum(BillingMonthly.entries),
+            user_id, group_by, start and _month_start(start), end and _month_start(end),
+        )
+    else:
+        query = _summary_statement(
+            Billing, Billing.date, _money_sum(Billing.price), func.count(),
+            user_id, group_by, start, end,
+        )
+    rows = read(query)
+    if group_by == 'pet':
+        return [(row[0], row[1], _to_money(row[2]), row[3]) for row in rows]
+    return [(row[0], None, _to_money(row[1]), row[2]) for row in rows]
+
+def _upsert(rows):
+    dialect = db.engine.dialect.name
+    insert_for = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+    statement = insert_for(BillingMonthly)
+    statement = statement.on_conflict_do_update(
+        index_elements=['user_id', 'pet_id', 'type', 'month'],
+        set_={
+            'total': BillingMonthly.total + statement.excluded.total,
+            'entries': BillingMonthly.entries + statement.excluded.entries,
+        },
+    )
+    db.session.execute(statement, rows)
+
+def apply_billing(entries, sign=1):
+    """Add (sign=1) or remove (sign=-1) billing entries from the rollup.
+
+    `entries` are Billing objects or dicts of their values. Call before the
+    commit, so the rollup changes with the billing rows or not at all.
+    """
+    if not rollup_enabled():
+        return
+    deltas = defaultdict(lambda: [0, 0])
+    for entry in entries:
+        values = entry if isinstance(entry, dict) else {
+            'user_id': entry.user_id, 'pet_id': entry.pet_id, 'type': entry.type,
+            'date': entry.date, 'price': entry.price,
+        }
+        key = (values['user_id'], values['pet_id'], values['type'], _month_start(values['date']))
+        deltas[key][0] += sign * values['price']
+        deltas[key][1] += sign
+    if deltas:
+        _upsert([
+            {'user_id': user_id, 'pet_id': pet_id, 'type': type_, 'month': month,
+             'total': total, 'entries': count}
+            for (user_id, pet_id, type_, month), (total, count) in deltas.items()
+        ])
+
+def forget_pet(pet_id):
+    if rollup_enabled():
+        db.session.execute(delete(BillingMonthly).where(BillingMonthly.pet_id == pet_id))
+
+def rebuild_rollup():
+    """Recompute billing_monthly from the billing table; returns its row count."""
+    month = _month_start_sql(Billing.date)
+    total = _money_sum(Billing.price)
+    if db.engine.dialect.name != 'postgresql':
+        total = total / 100.0
+    grouped = (
+        select(Billing.user_id, Billing.pet_id, Billing.type, month, total, func.count())
+        .group_by(Billing.user_id, Billing.pet_id, Billing.type, month)
+    )
+    db.session.execute(delete(BillingMonthly))
+    db.session.execute(
+        insert(BillingMonthly).from_select(
+            ['user_id', 'pet_id', 'type', 'month', 'total', 'entries'], grouped
+        )
+    )
+    db.session.commit()
+    return db.session.query(func.count()).select_from(BillingMonthly).scalar()
@@ -0,0 +1,155 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List, Optional, Union
+import msgspec
+from flask import Response
+
+# Response schemas for the list endpoints. Each Struct's fields are in the same
+# order as the columns its query selects (see queries.py), so a result Row is
+# turned into a Struct positionally, with no ORM instance or intermediate dict.
+# Dates and datetimes are encoded by msgspec as ISO strings, matching what
+# to_dict() produced.
+
+CENT = Decimal('0.01')
+
+class VetOut(msgspec.Struct, gc=False):
+    id: int
+    name: Optional[str]
+    specialty: Optional[str]
+    information: Optional[str]
+
+class PetOut(msgspec.Struct, gc=False):
+    id: int
+    user_id: int
+    name: str
+    species: str
+    breed: str
+    dob: date
+    weight: Decimal
+    version: int
+
+class MedicationOut(msgspec.Struct, gc=False):
+    id: int
+    pet_id: int
+    user_id: int
+    name: str
+    dosage: str
+    description: Optional[str]
+    start_date: date
+    end_date: Union[date, str]
+    side_effects: Optional[str]
+    instructions: Optional[str]
+    refill: Optional[bool]
+    created_at: Optional[datetime]
+    pet_name: str
+    version: int
+
+class BillingOut(msgspec.Struct, gc=False):
+    id: int
+    user_id: int
+    pet_id: int
+    type: str
+    price: Decimal
+    description: Optional[str]
+    date: date
+    pet_name: str
+    version: int
+
+class AppointmentOut(msgspec.Struct, gc=False):
+    id: int
+    user_id: int
+    pet_id: int
+    date: date
+    vet_id: int
+    reason: str
+    time: str
+    location: str
+    notes: Optional[str]
+    version: int
+
+class RecordOut(msgspec.Struct, gc=False):
+    id: int
+    pet_id: int
+    pet_name: str
+    name: str
+    date: date
+    description: str
+    vet_id: int
+    vet_name: Optional[str]
+    record_type: str
+    version: int
+
+class ReminderOut(msgspec.Struct, gc=False):
+    id: int
+    medication_id: int
+    medication_name: str
+    pet_id: int
+    pet_name: str
+    kind: str
+    due_date: date
+
+class VetSlotsOut(msgspec.Struct, gc=False):
+    vet_id: int
+    date: date
+    free: List[str]
+
+class SearchHitOut(msgspec.Struct, gc=False):
+    type: str
+    id: int
+    pet_id: Optional[int]
+    title: Optional[str]
+    rank: float
+
+class BillingSummaryOut(msgspec.Struct, gc=False):
+    key: Union[int, str]
+    pet_name: Optional[str]
+    total: Decimal
+    count: int
+    average: Decimal
+
+def vets_out(rows):
+    return [VetOut(*row) for row in rows]
+
+def pets_out(rows):
+    return [PetOut(*row) for row in rows]
+
+def medications_out(rows):
+    # Medications without an end date are shown as 'Ongoing'.
+    return [
+        MedicationOut(*row[:7], row[7] or 'Ongoing', *row[8:])
+        for row in rows
+    ]
+
+def billing_out(rows):
+    return [BillingOut(*row) for row in rows]
+
+def appointments_out(rows):
+    return [
+        AppointmentOut(*row[:6], row[6].strftime('%H:%M') if row[6] else 'No time set', *row[7:])
+        for row in rows
+    ]
+
+def records_out(rows):
+    return [RecordOut(*row) for row in rows]
+
+def reminders_out(rows):
+    return [ReminderOut(*row) for row in rows]
+
+def billing_summary_out(rows):
+    return [
+        BillingSummaryOut(key, pet_name, total, count, (total / count).quantize(CENT))
+        for key, pet_name, total, count in rows
+    ]
+
+def search_hits_out(rows):
+    return [SearchHitOut(*row) for row in rows]
+
+def vet_slots_out(slots):
+    return [VetSlotsOut(vet_id, day, free) for (vet_id, day), free in sorted(slots.items())]
+
+# Decimal columns (pet weight, billing price) are written as JSON numbers,
+# exactly as stored, without a float() round trip.
+encoder = msgspec.json.Encoder(decimal_format='number')
+
+def json_response(payload, status=200):
+    return Response(encoder.encode(payload), status=status, mimetype='application/json')
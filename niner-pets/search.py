@@ -0,0 +1,120 @@
+import re
+from sqlalchemy import DDL, event, func, literal, literal_column, select, table, column, union_all
+from models import db, Vet, Medication, Record
+from queries import read
+
+# Keyword search over medical records, medications and the vet directory.
+#
+# On Postgres each table has a GIN index on a tsvector expression (see
+# SEARCH_DOCUMENTS and migration 0004); the index is an expression over the
+# row itself, so Postgres keeps it current on every write. SQLite (local runs
+# and smoke tests) uses one FTS5 table per model instead, keyed by the row id
+# and kept current by triggers, which also covers bulk inserts and deletes.
+#
+# Records and medications are scoped to the caller's user_id; vets are shared.
+
+LANGUAGE = 'english'
+
+# kind -> (model, text columns, title column, user-scoped)
+SEARCH_DOCUMENTS = {
+    'record': (Record, ('name', 'description'), 'name', True),
+    'medication': (Medication, ('name', 'description', 'side_effects', 'instructions'), 'name', True),
+    'vet': (Vet, ('name', 'specialty', 'information'), 'name', False),
+}
+
+def _sql_body(columns, prefix=''):
+    return " || ' ' || ".join(f"coalesce({prefix}{name}, '')" for name in columns)
+
+def _postgres_ddl():
+    return [
+        f"CREATE INDEX IF NOT EXISTS ix_{model.__tablename__}_search ON {model.__tablename__} "
+        f"USING gin (to_tsvector('{LANGUAGE}', {_sql_body(columns)}))"
+        for model, columns, _, _ in SEARCH_DOCUMENTS.values()
+    ]
+
+def _sqlite_ddl():
+    statements = []
+    for model, columns, _, _ in SEARCH_DOCUMENTS.values():
+        name = model.__tablename__
+        insert = f"INSERT INTO {name}_fts (rowid, body) VALUES (new.id, {_sql_body(columns, 'new.')});"
+        delete = f"DELETE FROM {name}_fts WHERE rowid = old.id;"
+        statements += [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {name}_fts USING fts5(body, tokenize='porter')",
+            f"CREATE TRIGGER IF NOT EXISTS {name}_fts_insert AFTER INSERT ON {name} BEGIN {insert} END",
+            f"CREATE TRIGGER IF NOT EXISTS {name}_fts_delete AFTER DELETE ON {name} BEGIN {delete} END",
+            f"CREATE TRIGGER IF NOT EXISTS {name}_fts_update AFTER UPDATE ON {name} BEGIN {delete} {insert} END",
+        ]
+    return statements
+
+# Databases built by db.create_all() (development, smoke tests) get the same
+# search objects as the migration creates.
+for statement in _postgres_ddl():
+    event.listen(db.metadata, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+for statement in _sqlite_ddl():
+    event.listen(db.metadata, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for model, _, _, _ in SEARCH_DOCUMENTS.values():
+    event.listen(db.metadata, 'after_drop',
+                 DDL(f'DROP TABLE IF EXISTS {model.__tablename__}_fts').execute_if(dialect='sqlite'))
+
+def _scope(statement, model, user_scoped, user_id):
+    if user_scoped:
+        statement = statement.where(model.user_id == user_id)
+    return statement
+
+def _hit_columns(kind, model, title):
+    pet_id = model.pet_id if hasattr(model, 'pet_id') else literal(None)
+    return (literal(kind).label('type'), model.id.label('id'), pet_id.label('pet_id'),
+            getattr(model, title).label('title'))
+
+def _postgres_statement(terms, user_id):
+    def inline(value):
+        # Literal SQL, so the expression matches the one the index was built on.
+        return literal_column(f"'{value}'")
+
+    query = func.websearch_to_tsquery(inline(LANGUAGE), terms)
+    parts = []
+    for kind, (model, columns, title, user_scoped) in SEARCH_DOCUMENTS.items():
+        body = func.coalesce(getattr(model, columns[0]), inline(''))
+        for name in columns[1:]:
+            body = body.op('||')(inline(' ')).op('||')(func.coalesce(getattr(model, name), inline('')))
+        document = func.to_tsvector(inline(LANGUAGE), body)
+        statement = (
+            select(*_hit_columns(kind, model, title), func.ts_rank(document, query).label('rank'))
+            .where(document.op('@@')(query))
+        )
+        parts.append(_scope(statement, model, user_scoped, user_id))
+    return union_all(*parts)
+
+def _sqlite_statement(terms, user_id):
+    # Quote every word so user input is never read as FTS5 query syntax.
+    match = ' '.join(f'"{word}"' for word in re.findall(r'\w+', terms))
+    parts = []
+    for kind, (model, _, title, user_scoped) in SEARCH_DOCUMENTS.items():
+        fts = table(f'{model.__tablename__}_fts', column('rowid'))
+        fts_ref = literal_column(fts.name)
+        statement = (
+            select(*_hit_columns(kind, model, title), (-func.bm25(fts_ref)).label('rank'))
+            .select_from(fts)
+            .join(model, model.id == fts.c.rowid)
+            .where(fts_ref.op('MATCH')(match))
+        )
+        parts.append(_scope(statement, model, user_scoped, user_id))
+    return union_all(*parts)
+
+def has_terms(terms):
+    return bool(re.search(r'\w', terms or ''))
+
+def search(terms, user_id, limit, offset=0):
+    """Ranked hits (type, id, pet_id, title, rank), best first, plus whether
+    more remain after this page."""
+    if db.engine.dialect.name == 'postgresql':
+        hits = _postgres_statement(terms, user_id).subquery()
+    else:
+        hits = _sqlite_statement(terms, user_id).subquery()
+    rows = read(
+        select(hits)
+        .order_by(hits.c.rank.desc(), hits.c.type, hits.c.id)
+        .limit(limit + 1)
+        .offset(offset)
+    )
+    return rows[:limit], len(rows) > limit
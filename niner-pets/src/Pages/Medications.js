@@ -169,8 +169,8 @@ const Medications = () => {
         
         setFormLoading(true);
     
-        if (!formData.petId || !formData.name || !formData.dosage || !formData.startDate || !formData.sideEffects || !formData.instructions) {
-            handleSnackbarOpen("All fields except end date are required.", 'error');
+        if (!formData.petId || !formData.name || !formData.dosage || !formData.startDate || !formData.endDate || !formData.sideEffects || !formData.instructions) {
+            handleSnackbarOpen("All fields are required.", 'error');
             return; 
         }
     
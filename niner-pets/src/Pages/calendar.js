@@ -73,6 +73,7 @@ function Calendar() {
   const [userId, setUserId] = useState(null);
   const [snackbarOpen, setSnackbarOpen] = useState(false); 
   const [snackbarMessage, setSnackbarMessage] = useState('');
+  const [visibleRange, setVisibleRange] = useState(null);
 
   // Fetch user data on mount
   useEffect(() => {
@@ -91,15 +92,17 @@ function Calendar() {
       } else {
         console.error('Failed to fetch user data');
       }
+      setLoading(false);
     };
     fetchUserData();
   }, []);
 
-  // Fetch appointments for the user
+  // Fetch only the appointments in the dates the calendar is showing. The
+  // calendar stays mounted while it loads, so it keeps its current month.
   useEffect(() => {
-    if (!userId) return;
-    setLoading(true);
-    fetch(`http://localhost:5000/appointments?user_id=${userId}`)
+    if (!userId || !visibleRange) return;
+    const { start, end } = visibleRange;
+    fetch(`http://localhost:5000/appointments/range?user_id=${userId}&start=${start}&end=${end}`)
       .then((response) => response.json())
       .then((appointments) => {
         const mappedEvents = appointments.map((appointment) => ({
@@ -113,13 +116,22 @@ function Calendar() {
           reason: appointment.reason,
         }));
         setEvents(mappedEvents);
-        setLoading(false);
       })
       .catch((error) => {
         setError('Error fetching appointment data: ' + error.message);
-        setLoading(false);
       });
-  }, [userId]);
+  }, [userId, visibleRange]);
+
+  // FullCalendar calls this whenever the visible dates change (prev/next,
+  // today, switching views). Its end is exclusive; the range endpoint's end
+  // date is inclusive.
+  const handleDatesSet = (dateInfo) => {
+    const toDateString = (date) =>
+      `${date.getFullYear()}-${String(date.getMonth() + 1).padStart(2, '0')}-${String(date.getDate()).padStart(2, '0')}`;
+    const lastDay = new Date(dateInfo.end);
+    lastDay.setDate(lastDay.getDate() - 1);
+    setVisibleRange({ start: toDateString(dateInfo.start), end: toDateString(lastDay) });
+  };
 
   // Handle click on event to show details
   const handleEventClick = (clickInfo) => {
@@ -218,6 +230,7 @@ function Calendar() {
             plugins={[dayGridPlugin, interactionPlugin]}
             initialView="dayGridMonth"
             events={events}
+            datesSet={handleDatesSet}
             eventClick={handleEventClick}
             editable={true}
             selectable={true}
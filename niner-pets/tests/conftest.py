@@ -0,0 +1,46 @@
+import os, sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from config import DevelopmentConfig
+import cache
+from models import db, User, Vet
+
+class TestConfig(DevelopmentConfig):
+    TESTING = True
+    DEBUG = False
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    SQLALCHEMY_BINDS = {}
+    DATABASE_REPLICA_URLS = []
+    REMINDER_SCHEDULER = False
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    # Each test gets a fresh database, so nothing cached for an earlier one
+    # may be served to it.
+    cache.backend.clear()
+    # Only the primary: db remembers the replica binds of apps built by
+    # earlier tests, and this app has no engines for them.
+    with app.app_context():
+        db.create_all(bind_key=None)
+        yield app
+        db.session.remove()
+        db.drop_all(bind_key=None)
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def owner(app):
+    """A user and a vet to hang pets and appointments off."""
+    user = User(email='owner@uncc.edu', username='owner')
+    user.set_password('pw')
+    vet = Vet(name='Dr Vet', specialty='general', information='info')
+    db.session.add_all([user, vet])
+    db.session.commit()
+    return user, vet
@@ -0,0 +1,37 @@
+from datetime import date
+import pytest
+from models import db, Pet, Appointment
+
+@pytest.fixture
+def booking(owner):
+    user, vet = owner
+    pet = Pet(user_id=user.id, name='Rex', species='dog', breed='lab', dob=date(2020, 1, 1), weight=10)
+    db.session.add(pet)
+    db.session.commit()
+    def book(client, at, day='2024-01-08'):
+        return client.post('/appointments', json={'user_id': user.id, 'pet_id': pet.id, 'vet_id': vet.id,
+                                                  'reason': 'checkup', 'date': day, 'time': at,
+                                                  'location': 'clinic'})
+    return book
+
+def test_overlapping_booking_is_409(client, booking):
+    assert booking(client, '10:00').status_code == 201
+    for at in ('10:00', '10:15', '09:45'):
+        response = booking(client, at)
+        assert response.status_code == 409, at
+        assert response.get_json() == {'error': 'The vet already has an appointment at that time.'}
+    assert db.session.query(Appointment).count() == 1
+
+def test_adjacent_slots_are_accepted(client, booking):
+    assert booking(client, '10:00').status_code == 201
+    assert booking(client, '10:30').status_code == 201
+    assert booking(client, '09:30').status_code == 201
+    assert booking(client, '10:00', day='2024-01-09').status_code == 201
+
+def test_moving_onto_a_booked_slot_is_409(client, booking):
+    assert booking(client, '10:00').status_code == 201
+    assert booking(client, '11:00').status_code == 201
+    later = db.session.query(Appointment.id).order_by(Appointment.time.desc()).first().id
+
+    assert client.put(f'/appointments/{later}', json={'time': '10:15'}).status_code == 409
+    assert client.put(f'/appointments/{later}', json={'time': '10:30'}).status_code == 200
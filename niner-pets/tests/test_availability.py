@@ -0,0 +1,64 @@
+from datetime import date, time
+import pytest
+import availability, queries
+from models import db, Pet, Appointment
+
+MONDAY = date(2024, 1, 8)
+
+def test_sweep_skips_slots_within_one_slot_of_a_booking():
+    free = availability._sweep(MONDAY, [time(9), time(10, 15)], time(9), time(12), 30)
+    assert free == ['09:30', '11:00', '11:30']
+
+def test_sweep_of_an_empty_day_is_every_slot():
+    assert availability._sweep(MONDAY, [], time(9), time(11), 30) == ['09:00', '09:30', '10:00', '10:30']
+
+@pytest.fixture
+def pet(owner):
+    user, _ = owner
+    pet = Pet(user_id=user.id, name='Rex', species='dog', breed='lab', dob=date(2020, 1, 1), weight=10)
+    db.session.add(pet)
+    db.session.commit()
+    return pet
+
+def book(pet, vet, at):
+    db.session.add(Appointment(user_id=pet.user_id, pet_id=pet.id, vet_id=vet.id, reason='checkup',
+                               date=MONDAY, time=at, location='clinic'))
+    db.session.commit()
+
+def free_on_monday(client, vet):
+    response = client.get('/vets/availability', query_string={'vet_id': vet.id, 'start': MONDAY, 'end': MONDAY})
+    assert response.status_code == 200
+    [day] = response.get_json()
+    return day['free']
+
+def test_booking_invalidates_the_cached_day(client, owner, pet):
+    _, vet = owner
+    assert '10:00' in free_on_monday(client, vet)
+    hits = availability.stats['hits']
+    assert '10:00' in free_on_monday(client, vet)
+    assert availability.stats['hits'] == hits + 1
+
+    response = client.post('/appointments', json={'user_id': pet.user_id, 'pet_id': pet.id, 'vet_id': vet.id,
+                                                  'reason': 'checkup', 'date': MONDAY.isoformat(), 'time': '10:00',
+                                                  'location': 'clinic'})
+    assert response.status_code == 201
+    assert '10:00' not in free_on_monday(client, vet)
+
+def test_slots_read_before_a_booking_are_not_cached_after_it(app, owner, pet, monkeypatch):
+    _, vet = owner
+    get_vet_bookings = queries.get_vet_bookings
+
+    def booked_meanwhile(*args):
+        # Another request books 10:00 after these bookings were read and
+        # before the computed slots are stored.
+        rows = get_vet_bookings(*args)
+        book(pet, vet, time(10))
+        availability.invalidate(vet.id)
+        return rows
+    monkeypatch.setattr(queries, 'get_vet_bookings', booked_meanwhile)
+    with app.test_request_context():
+        assert '10:00' in availability.free_slots([vet.id], MONDAY, MONDAY)[(vet.id, MONDAY)]
+
+    monkeypatch.setattr(queries, 'get_vet_bookings', get_vet_bookings)
+    with app.test_request_context():
+        assert '10:00' not in availability.free_slots([vet.id], MONDAY, MONDAY)[(vet.id, MONDAY)]
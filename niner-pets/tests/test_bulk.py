@@ -0,0 +1,25 @@
+from datetime import date
+import bulk
+from models import db, Pet, Medication
+
+def test_rejected_chunk_is_retried_row_by_row(app, owner):
+    user, _ = owner
+    pet = Pet(user_id=user.id, name='Rex', species='dog', breed='lab', dob=date(2020, 1, 1), weight=10)
+    db.session.add(pet)
+    db.session.commit()
+
+    def medication(name, dosage='1'):
+        return {'user_id': user.id, 'pet_id': pet.id, 'name': name, 'dosage': dosage,
+                'start_date': date(2024, 1, 1), 'end_date': date(2024, 2, 1)}
+    # Row 3 passes validation but breaks dosage's NOT NULL in the database,
+    # which fails the chunk's executemany as a whole.
+    rows = [(1, medication('a'), None), (2, medication('b'), None), (3, medication('c', None), None),
+            (4, medication('d'), None), (5, None, 'Invalid JSON.')]
+
+    inserted, errors, user_ids = bulk.import_rows(Medication, rows, validate=lambda data: data)
+
+    assert inserted == 3
+    assert [error['row'] for error in errors] == [3, 5]
+    assert errors[0]['error'].startswith('Rejected by the database:')
+    assert user_ids == {user.id}
+    assert sorted(name for name, in db.session.query(Medication.name)) == ['a', 'b', 'd']
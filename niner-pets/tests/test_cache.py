@@ -0,0 +1,47 @@
+from sqlalchemy import event
+from models import db
+from test_query_counts import add_pets
+
+def test_matching_if_none_match_is_304_without_a_query(client, owner):
+    user, vet = owner
+    add_pets(user, vet, 2)
+    query = {'user_id': user.id}
+    first = client.get('/pets', query_string=query)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert etag.startswith('W/"pets-')
+    assert 'Last-Modified' in first.headers
+
+    statements = []
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = client.get('/pets', query_string=query, headers={'If-None-Match': etag})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert response.headers['ETag'] == etag
+    assert statements == []
+
+def test_etag_changes_after_a_write_to_the_same_scope(client, owner):
+    user, vet = owner
+    add_pets(user, vet, 1)
+    query = {'user_id': user.id}
+    etag = client.get('/pets', query_string=query).headers['ETag']
+
+    response = client.post('/pets', json={'user_id': user.id, 'name': 'Max', 'species': 'cat', 'breed': 'tabby',
+                                          'dob': '2021-05-01', 'weight': 4})
+    assert response.status_code == 201
+
+    response = client.get('/pets', query_string=query, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert len(response.get_json()) == 2
+
+def test_other_scopes_keep_their_etag(client, owner):
+    user, vet = owner
+    etag = client.get('/vets').headers['ETag']
+    add_pets(user, vet, 1)
+    assert client.get('/vets', headers={'If-None-Match': etag}).status_code == 304
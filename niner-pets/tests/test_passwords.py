@@ -0,0 +1,28 @@
+import passwords
+from app import create_app
+from models import db, User
+from conftest import TestConfig
+
+class CheapHashConfig(TestConfig):
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    PASSWORD_HASH_WORKERS = 1
+    PASSWORD_HASH_MAX_PENDING = 1
+
+def test_hash_settings_come_from_the_app_config():
+    app = create_app(CheapHashConfig)
+    try:
+        assert passwords.HASH_WORKERS == 1
+        with app.app_context():
+            db.create_all()
+            user = User(email='cheap@uncc.edu', username='cheap')
+            user.set_password('secret')
+            db.session.add(user)
+            db.session.commit()
+            assert user.password.startswith('pbkdf2:sha256:1000$')
+            assert not passwords.needs_rehash(user.password)
+            assert passwords.needs_rehash(passwords.generate_password_hash('secret', 'scrypt:16384:8:1'))
+
+        response = app.test_client().post('/login', json={'email_or_username': 'cheap', 'password': 'secret'})
+        assert response.status_code == 200
+    finally:
+        passwords.init_app(create_app(TestConfig))
@@ -0,0 +1,80 @@
+from datetime import date, time, timedelta
+from sqlalchemy import event
+import cache
+from models import db, Pet, Medication, Billing, Appointment, Record
+
+N = 5
+LIST_ROUTES = ['/pets', '/medications', '/billing', '/medicalrecords', '/appointments']
+
+def add_pets(user, vet, count):
+    """Add `count` pets, each with one medication, bill, appointment and record."""
+    start = db.session.query(Pet).filter_by(user_id=user.id).count()
+    for i in range(start, start + count):
+        day = date(2024, 1, 1) + timedelta(days=i)
+        pet = Pet(user_id=user.id, name=f'pet{i}', species='dog', breed='lab', dob=date(2020, 1, 1), weight=10)
+        db.session.add(pet)
+        db.session.flush()
+        db.session.add_all([
+            Medication(user_id=user.id, pet_id=pet.id, name=f'med{i}', dosage='1', start_date=day,
+                       end_date=day + timedelta(days=30)),
+            Billing(user_id=user.id, pet_id=pet.id, type='exam', price=10, description='d', date=day),
+            Appointment(user_id=user.id, pet_id=pet.id, vet_id=vet.id, reason='checkup', date=day,
+                        time=time(9), location='clinic'),
+            Record(user_id=user.id, pet_id=pet.id, vet_id=vet.id, name=f'record{i}', date=day,
+                   description='desc', record_type='exam'),
+        ])
+    db.session.commit()
+    # Rows added straight through the session skip the routes' invalidation.
+    cache.invalidate_user(user.id)
+
+def statements_per_route(client, user_id):
+    counts = {}
+    def count(*args):
+        counts[route] += 1
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        for route in LIST_ROUTES:
+            counts[route] = 0
+            response = client.get(route, query_string={'user_id': user_id, 'limit': 500})
+            assert response.status_code == 200, (route, response.get_json())
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    return counts
+
+def test_list_queries_do_not_grow_with_rows(client, owner):
+    user, vet = owner
+    add_pets(user, vet, N)
+    small = statements_per_route(client, user.id)
+    assert len(client.get('/medications', query_string={'user_id': user.id}).get_json()) == N
+
+    add_pets(user, vet, 9 * N)
+    large = statements_per_route(client, user.id)
+    assert len(client.get('/medications', query_string={'user_id': user.id}).get_json()) == 10 * N
+
+    assert large == small
+    assert all(count == 1 for count in small.values()), small
+
+def dashboard_statements(client, token):
+    statements = []
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        response = client.get('/dashboard', headers={'Authorization': f'Bearer {token}'})
+        assert response.status_code == 200, response.get_json()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    return response.get_json(), len(statements)
+
+def test_dashboard_runs_one_query_per_section(client, owner):
+    user, vet = owner
+    token = client.post('/login', json={'email_or_username': 'owner', 'password': 'pw'}).get_json()['token']
+    add_pets(user, vet, N)
+    small, small_count = dashboard_statements(client, token)
+    add_pets(user, vet, 9 * N)
+    large, large_count = dashboard_statements(client, token)
+
+    assert len(small['pets']) == N and len(large['pets']) == 10 * N
+    # The user section comes from the token's claims; every other section is
+    # one statement.
+    assert small_count == large_count == 6
@@ -0,0 +1,23 @@
+from datetime import date, timedelta
+import reminders
+from models import db, Pet, Medication, MedicationReminder
+
+TODAY = date(2024, 3, 1)
+
+def test_scanning_twice_creates_each_reminder_once(app, owner):
+    user, _ = owner
+    pet = Pet(user_id=user.id, name='Rex', species='dog', breed='lab', dob=date(2020, 1, 1), weight=10)
+    db.session.add(pet)
+    db.session.flush()
+    for i, ends_in in enumerate((0, 2, 5, 30)):
+        db.session.add(Medication(user_id=user.id, pet_id=pet.id, name=f'med{i}', dosage='1', refill=i % 2 == 0,
+                                  start_date=TODAY - timedelta(days=10), end_date=TODAY + timedelta(days=ends_in)))
+    db.session.commit()
+
+    # A chunk smaller than the matches makes the scan page through them.
+    assert reminders.scan(7, today=TODAY, chunk_size=2) == (3, 3)
+    assert reminders.scan(7, today=TODAY, chunk_size=2) == (3, 0)
+
+    kinds = sorted((row.kind, row.due_date) for row in db.session.query(MedicationReminder))
+    assert kinds == [(reminders.EXPIRY, TODAY + timedelta(days=2)),
+                     (reminders.REFILL, TODAY), (reminders.REFILL, TODAY + timedelta(days=5))]
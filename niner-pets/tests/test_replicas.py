@@ -0,0 +1,76 @@
+import shutil, time
+from datetime import date, time as clock
+import pytest
+import availability, cache, replicas
+from app import create_app
+from config import replica_binds
+from models import db, User, Vet, Pet, Appointment
+from conftest import TestConfig
+
+MONDAY = date(2024, 1, 8)
+STICKY_SECONDS = 0.3
+
+@pytest.fixture
+def replicated(tmp_path):
+    """An app on a primary SQLite file with a copy of it as its one replica,
+    and a user, pet and two vets that are past their sticky window."""
+    replica_url = f'sqlite:///{tmp_path / "replica.db"}'
+
+    class ReplicaConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "primary.db"}'
+        DATABASE_REPLICA_URLS = [replica_url]
+        SQLALCHEMY_BINDS = replica_binds([replica_url], options=lambda url: {})
+        REPLICA_STICKY_SECONDS = STICKY_SECONDS
+
+    app = create_app(ReplicaConfig)
+    cache.backend.clear()
+    with app.app_context():
+        db.create_all(bind_key=None)
+        user = User(email='owner@uncc.edu', username='owner', password='-')
+        vets = [Vet(name=f'Dr Vet {n}', specialty='general', information='info') for n in range(2)]
+        db.session.add_all([user, *vets])
+        db.session.flush()
+        pet = Pet(user_id=user.id, name='Rex', species='dog', breed='lab', dob=date(2020, 1, 1), weight=10)
+        db.session.add(pet)
+        db.session.commit()
+        ids = {'user_id': user.id, 'pet_id': pet.id, 'vet_ids': [vet.id for vet in vets]}
+        cache.generations(availability.vet_scope(vet_id) for vet_id in ids['vet_ids'])
+        db.session.remove()
+    shutil.copy(tmp_path / 'primary.db', tmp_path / 'replica.db')
+    time.sleep(STICKY_SECONDS)
+    return app, ids
+
+def routed(client, vet_id):
+    """The free slots on MONDAY and where the lookup's reads went."""
+    before = dict(replicas.stats)
+    response = client.get('/vets/availability', query_string={'vet_id': vet_id, 'start': MONDAY, 'end': MONDAY})
+    assert response.status_code == 200
+    moved = [name for name in before if replicas.stats[name] != before[name]]
+    return response.get_json()[0]['free'], moved
+
+def test_only_the_booked_vets_reads_stay_on_the_primary(replicated):
+    app, ids = replicated
+    booked_vet, other_vet = ids['vet_ids']
+    client = app.test_client()
+
+    free, moved = routed(client, booked_vet)
+    assert moved == ['replica']
+    assert '10:00' in free
+
+    response = client.post('/appointments', json={'user_id': ids['user_id'], 'pet_id': ids['pet_id'],
+                                                  'vet_id': booked_vet, 'reason': 'checkup',
+                                                  'date': MONDAY.isoformat(), 'time': '10:00', 'location': 'clinic'})
+    assert response.status_code == 201
+    free, moved = routed(client, booked_vet)
+    assert moved == ['sticky']
+    assert '10:00' not in free
+
+    # Written to the primary only, without bumping the vet's scope: a read
+    # from the replica can't see it.
+    with app.app_context():
+        db.session.add(Appointment(user_id=ids['user_id'], pet_id=ids['pet_id'], vet_id=other_vet,
+                                   reason='checkup', date=MONDAY, time=clock(10), location='clinic'))
+        db.session.commit()
+    free, moved = routed(client, other_vet)
+    assert moved == ['replica']
+    assert '10:00' in free
@@ -0,0 +1,65 @@
+from datetime import date
+import pytest
+from models import db, Pet, Medication
+from updates import PRECONDITION_FAILED
+
+@pytest.fixture
+def pet(owner):
+    user, _ = owner
+    pet = Pet(user_id=user.id, name='Rex', species='dog', breed='lab', dob=date(2020, 1, 1), weight=10)
+    db.session.add(pet)
+    db.session.commit()
+    return pet
+
+@pytest.fixture
+def medication(pet):
+    medication = Medication(user_id=pet.user_id, pet_id=pet.id, name='med', dosage='1',
+                            start_date=date(2024, 1, 10), end_date=date(2024, 1, 20))
+    db.session.add(medication)
+    db.session.commit()
+    return medication
+
+def stored(model, row_id):
+    db.session.expire_all()
+    return db.session.get(model, row_id)
+
+def test_put_sets_only_the_fields_sent_and_bumps_the_version(client, pet):
+    response = client.put(f'/pets/{pet.id}', json={'weight': 12})
+    assert response.status_code == 200
+    assert response.headers['ETag'] == '"2"'
+
+    pet = stored(Pet, pet.id)
+    assert (pet.name, pet.breed, pet.weight, pet.version) == ('Rex', 'lab', 12, 2)
+
+def test_if_match_with_a_stale_version_is_412(client, pet):
+    etag = client.get(f'/pets/{pet.id}').headers['ETag']
+    assert client.put(f'/pets/{pet.id}', json={'name': 'Max'}, headers={'If-Match': etag}).status_code == 200
+
+    response = client.put(f'/pets/{pet.id}', json={'name': 'Bo'}, headers={'If-Match': etag})
+    assert response.status_code == 412
+    assert response.get_json() == {'error': PRECONDITION_FAILED}
+    assert stored(Pet, pet.id).name == 'Max'
+
+def test_missing_row_is_404_not_412(client, pet):
+    assert client.put('/pets/999', json={'name': 'Max'}).status_code == 404
+    assert client.put('/pets/999', json={'name': 'Max'}, headers={'If-Match': '"1"'}).status_code == 404
+
+def test_one_sided_date_change_is_checked_against_the_stored_date(client, medication):
+    url = f'/medications/{medication.id}'
+    response = client.put(url, json={'end_date': '2024-01-05'})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'End date cannot be before start date.'}
+
+    response = client.put(url, json={'start_date': '2024-01-25'})
+    assert response.status_code == 400
+
+    assert client.put(url, json={'end_date': '2024-01-15'}).status_code == 200
+    medication = stored(Medication, medication.id)
+    assert (medication.start_date, medication.end_date) == (date(2024, 1, 10), date(2024, 1, 15))
+
+def test_stale_if_match_is_412_even_when_the_dates_are_wrong_too(client, medication):
+    url = f'/medications/{medication.id}'
+    assert client.put(url, json={'name': 'other'}).status_code == 200
+
+    response = client.put(url, json={'end_date': '2024-01-05'}, headers={'If-Match': '"1"'})
+    assert response.status_code == 412
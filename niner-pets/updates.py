@@ -0,0 +1,55 @@
+from flask import abort, request
+from sqlalchemy import select, update
+from models import db
+from queries import read_one
+from validation import ValidationError
+
+# Single-statement updates for the PUT routes. Each one is one
+# UPDATE ... RETURNING that sets only the fields the client sent, bumps the
+# row's version and hands back the columns the route answers with, so there
+# is no SELECT before the write and no ORM object or lazy load after it.
+#
+# Optimistic concurrency: responses carry the row's version as an ETag, and a
+# PUT with If-Match only matches a row still at one of the listed versions.
+# Someone else's write in between makes the UPDATE match nothing, and the
+# route answers 412 instead of overwriting it. Nothing is locked. Without
+# If-Match the last write wins, as before.
+
+PRECONDITION_FAILED = 'This entry was changed by someone else. Reload it and try again.'
+
+def if_match_versions():
+    """Versions named by the request's If-Match header, or None when there is
+    no header or it is '*'."""
+    if not request.if_match or request.if_match.star_tag:
+        return None
+    return {int(tag) for tag in request.if_match.as_set() if tag.isdigit()}
+
+def update_returning(model, row_id, values, returning, where=()):
+    """Apply `values` to the row and return `returning` from it, or None when
+    no row matched (missing, wrong version or a failed `where` condition)."""
+    statement = (
+        update(model)
+        .where(model.id == row_id, *where)
+        .values(**values, version=model.version + 1)
+        .returning(*returning)
+    )
+    versions = if_match_versions()
+    if versions is not None:
+        statement = statement.where(model.version.in_(versions))
+    return db.session.connection().execute(statement).first()
+
+def explain_no_match(model, row_id, message=None):
+    """Raise the reason update_returning matched nothing: 404 if the row is
+    gone, 412 if its version moved on, otherwise `message` (400) for the
+    route's own `where` condition. Costs a SELECT, on the failure path only."""
+    row = read_one(select(model.version).where(model.id == row_id))
+    if row is None:
+        abort(404)
+    versions = if_match_versions()
+    if message is None or (versions is not None and row.version not in versions):
+        raise ValidationError(PRECONDITION_FAILED, 412)
+    raise ValidationError(message)
+
+def with_version(response, version):
+    response.set_etag(str(version))
+    return response
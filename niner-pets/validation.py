@@ -0,0 +1,127 @@
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+# Row validation shared by the single-row POST routes and the bulk import
+# endpoints. Each validator takes the incoming JSON/CSV row and returns the
+# column values to insert, or raises ValidationError with the message (and
+# status) the single-row route has always answered with.
+
+DATE_FORMAT_ERROR = 'Invalid date format. Please use YYYY-MM-DD.'
+# medications.end_date is NOT NULL, so a course can't be left open-ended.
+END_DATE_REQUIRED = 'End date is required.'
+
+# billing.price is NUMERIC(10, 2).
+CENT = Decimal('0.01')
+MAX_PRICE = Decimal('99999999.99')
+
+class ValidationError(ValueError):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+def parse_date(value, status=400):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ValidationError(DATE_FORMAT_ERROR, status)
+
+def parse_int(value, field):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValidationError(f'{field} must be a valid integer.')
+
+def parse_price(value):
+    # Prices are exact amounts in cents: str() first so a JSON float such as
+    # 19.99 becomes Decimal('19.99') rather than its binary approximation.
+    try:
+        price = Decimal(str(value)) if not isinstance(value, bool) else None
+    except InvalidOperation:
+        price = None
+    if price is None or not price.is_finite():
+        raise ValidationError('Price must be a number.')
+    if price != price.quantize(CENT):
+        raise ValidationError('Price must have at most two decimal places.')
+    if abs(price) > MAX_PRICE:
+        raise ValidationError('Price is too large.')
+    return price.quantize(CENT)
+
+def parse_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'y')
+    return bool(value)
+
+def validate_medication(data):
+    pet_id = data.get('pet_id')
+    user_id = data.get('user_id')
+    name = data.get('name')
+    dosage = data.get('dosage')
+    start_date = data.get('start_date')
+    end_date = data.get('end_date')
+
+    if not all([pet_id, user_id, name, dosage, start_date]):
+        raise ValidationError('All fields are required.')
+    if not end_date or end_date == 'Ongoing':
+        raise ValidationError(END_DATE_REQUIRED)
+
+    start_date = parse_date(start_date)
+    end_date = parse_date(end_date)
+    if end_date < start_date:
+        raise ValidationError('End date cannot be before start date.')
+
+    return {
+        'pet_id': parse_int(pet_id, 'pet_id'),
+        'user_id': parse_int(user_id, 'user_id'),
+        'name': name,
+        'dosage': dosage,
+        'description': data.get('description'),
+        'start_date': start_date,
+        'end_date': end_date,
+        'side_effects': data.get('side_effects'),
+        'instructions': data.get('instructions'),
+        'refill': parse_bool(data.get('refill', False)),
+    }
+
+def validate_billing(data):
+    user_id = data.get('user_id')
+    pet_id = data.get('pet_id')
+    billing_type = data.get('type')
+    price = data.get('price')
+    description = data.get('description')
+
+    if not all([pet_id, billing_type, price, description, user_id]):
+        raise ValidationError('All fields are required.')
+
+    price = parse_price(price)
+
+    return {
+        'user_id': parse_int(user_id, 'user_id'),
+        'pet_id': parse_int(pet_id, 'pet_id'),
+        'type': billing_type,
+        'price': price,
+        'description': description,
+        'date': parse_date(data.get('date')),
+    }
+
+def validate_record(data):
+    pet_id = data.get('pet_id')
+    user_id = data.get('user_id')
+    name = data.get('name')
+    date = data.get('date')
+    description = data.get('description')
+    vet_id = data.get('vet_id')
+    record_type = data.get('record_type')
+
+    if not all([pet_id, user_id, name, date, record_type, vet_id, description]):
+        raise ValidationError('All fields are required.')
+
+    return {
+        'pet_id': parse_int(pet_id, 'pet_id'),
+        'user_id': parse_int(user_id, 'user_id'),
+        'name': name,
+        'date': parse_date(date, status=401),
+        'description': description,
+        'vet_id': parse_int(vet_id, 'vet_id'),
+        'record_type': record_type,
+    }
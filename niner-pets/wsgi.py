@@ -0,0 +1,11 @@
+"""WSGI entry point: the app built from FLASK_CONFIG (default 'development').
+
+    flask --app wsgi db upgrade
+    FLASK_CONFIG=production gunicorn -c gunicorn.conf.py wsgi:app
+
+Importing app.py itself creates no app, so tools and benchmarks that only
+need create_app() don't start a second app (and its reminder scheduler).
+"""
+from app import create_app
+
+app = create_app()